@@ -20,6 +20,11 @@ class ABTest:
         else:
             return standard_price
     
+    def get_prices(self, item_ids, ml_prices, standard_prices):
+        # Batch version of get_price: one group lookup per item, prices picked with array ops
+        is_test = np.array([self.assign_group(item_id) == 'test' for item_id in item_ids], dtype=bool)
+        return np.where(is_test, np.asarray(ml_prices, dtype=float), np.asarray(standard_prices, dtype=float))
+    
     def record_sale(self, item_id, price, revenue, profit):
         group = self.assign_group(item_id)
         sale_data = {
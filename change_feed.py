@@ -0,0 +1,148 @@
+import bisect
+import json
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+class PriceChangeFeed:
+    """Sequence-numbered feed of published price changes.
+
+    Only rows whose new_price moved by more than a threshold since the last
+    published price for that gift card are appended. Records are JSON lines in
+    segment files named after their first sequence number, so consumers can
+    resume from any offset with read(from_seq). A card that leaves the
+    inventory gets a tombstone record with `removed` set and no price. The last
+    published price per card is kept in a snapshot, rewritten when a segment
+    rolls over or at most every snapshot_interval_seconds; records newer than
+    the snapshot are replayed on startup.
+    """
+
+    SNAPSHOT_FILE = "published_prices.parquet"
+
+    def __init__(self, root, segment_size=100000, snapshot_interval_seconds=300):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.snapshot_interval_seconds = snapshot_interval_seconds
+        self._published = {}
+        self._last_seq = 0
+        self._load_state()
+        # The open segment's line count is tracked here rather than re-read on every publish
+        self._segment_path, self._segment_count = self._current_segment()
+        self._last_snapshot = time.monotonic()
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    def _segments(self):
+        return sorted(self.root.glob('segment-*.jsonl'))
+
+    @staticmethod
+    def _segment_start(path):
+        return int(path.stem.split('-')[1])
+
+    def _load_state(self):
+        snapshot_path = self.root / self.SNAPSHOT_FILE
+        if snapshot_path.exists():
+            snapshot = pd.read_parquet(snapshot_path)
+            self._published = dict(zip(snapshot['gift_card_id'], snapshot['price']))
+            self._last_seq = int(snapshot['seq'].max()) if len(snapshot) else 0
+
+        # Records written after the last snapshot (e.g. before a crash)
+        for record in self.read(self._last_seq + 1):
+            if record.get('removed'):
+                self._published.pop(record['gift_card_id'], None)
+            else:
+                self._published[record['gift_card_id']] = record['new_price']
+            self._last_seq = record['seq']
+
+    def _save_snapshot(self):
+        snapshot = pd.DataFrame({
+            'gift_card_id': list(self._published),
+            'price': list(self._published.values()),
+        })
+        snapshot['seq'] = self._last_seq
+        tmp_path = self.root / f"{self.SNAPSHOT_FILE}.tmp"
+        snapshot.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.root / self.SNAPSHOT_FILE)
+        self._last_snapshot = time.monotonic()
+
+    def _current_segment(self):
+        segments = self._segments()
+        if segments:
+            with open(segments[-1], 'r') as f:
+                count = sum(1 for _ in f)
+            if count < self.segment_size:
+                return segments[-1], count
+        return self.root / f"segment-{self._last_seq + 1:020d}.jsonl", 0
+
+    def publish(self, changes_df, threshold=0.0):
+        """Append rows whose price moved by more than threshold and return them"""
+        last_prices = changes_df['gift_card_id'].map(self._published)
+        moved = last_prices.isna() | ((changes_df['new_price'] - last_prices).abs() > threshold)
+        delta_df = changes_df[moved]
+        if delta_df.empty:
+            return delta_df
+
+        self._append(delta_df.to_dict('records'))
+        return delta_df
+
+    def remove(self, gift_card_ids):
+        """Append a tombstone for each published card that left the inventory and return their ids"""
+        removed = [gift_card_id for gift_card_id in gift_card_ids if gift_card_id in self._published]
+        if removed:
+            self._append([{'gift_card_id': gift_card_id, 'new_price': None, 'removed': True}
+                          for gift_card_id in removed])
+        return removed
+
+    def _append(self, records):
+        published_at = pd.Timestamp.now().isoformat()
+        rolled_over = False
+        f = open(self._segment_path, 'a')
+        try:
+            for record in records:
+                if self._segment_count >= self.segment_size:
+                    f.close()
+                    self._segment_path = self.root / f"segment-{self._last_seq + 1:020d}.jsonl"
+                    self._segment_count = 0
+                    rolled_over = True
+                    f = open(self._segment_path, 'a')
+                self._last_seq += 1
+                record['seq'] = self._last_seq
+                record['published_at'] = published_at
+                f.write(json.dumps(record, default=str) + '\n')
+                self._segment_count += 1
+                if record.get('removed'):
+                    self._published.pop(record['gift_card_id'], None)
+                else:
+                    self._published[record['gift_card_id']] = record['new_price']
+        finally:
+            f.close()
+
+        # Skipping a snapshot is safe: startup replays every record after the snapshot's seq
+        if rolled_over or time.monotonic() - self._last_snapshot >= self.snapshot_interval_seconds:
+            self._save_snapshot()
+
+    def read(self, from_seq=1, limit=None):
+        """Yield feed records with seq >= from_seq, oldest first"""
+        segments = self._segments()
+        starts = [self._segment_start(path) for path in segments]
+        # The segment containing from_seq is the last one starting at or before it
+        first = max(bisect.bisect_right(starts, from_seq) - 1, 0)
+
+        yielded = 0
+        for path in segments[first:]:
+            with open(path, 'r') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record['seq'] < from_seq:
+                        continue
+                    yield record
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
@@ -0,0 +1,71 @@
+import threading
+import time
+
+class CircuitBreaker:
+    """Stops calling a failing source until it has had time to recover.
+
+    Closed: requests go through. After `failure_threshold` consecutive failures
+    the breaker opens and requests are skipped. Once `reset_seconds` have passed
+    it goes half-open and lets a single probe through: success closes it,
+    failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_seconds=300):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+class SourceHealth:
+    """A circuit breaker per market data source, keyed by base URL and endpoint"""
+
+    def __init__(self, failure_threshold=3, reset_seconds=300):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, source):
+        key = (source['base_url'], source['endpoint'])
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+            return breaker
+
+    def states(self):
+        with self._lock:
+            return {f"{base_url}{endpoint}": breaker.state for (base_url, endpoint), breaker in self._breakers.items()}
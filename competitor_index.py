@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# Competitor features attached to every priced item
+STAT_COLUMNS = ['competitor_count', 'competitor_min', 'competitor_p25', 'competitor_median',
+                'competitor_p75', 'competitor_max']
+_QUANTILES = [0.0, 0.25, 0.5, 0.75, 1.0]
+
+def _group_stats(groups):
+    quantiles = groups.quantile(_QUANTILES).unstack()
+    counts = groups.size().reindex(quantiles.index).to_numpy(dtype=float)
+    return quantiles.index, np.column_stack([counts, quantiles.to_numpy(dtype=float)])
+
+class CompetitorPriceIndex:
+    """Competitor price statistics per (brand, face value), built once per cycle.
+
+    Rows hold STAT_COLUMNS as a float array, so pricing a slice of the
+    inventory is one indexer lookup instead of walking each card's price list.
+    Cards whose face value has no competitor quotes fall back to the brand's
+    quotes as a fraction of their face value, scaled to the card's face value,
+    so quotes for other denominations never leak in as raw prices. Cards
+    without a face value, or whose brand has no face-valued quotes, get a
+    count of 0 and NaNs.
+    """
+
+    def __init__(self, face_value_index, face_value_stats, ratio_index, ratio_stats):
+        self.face_value_index = face_value_index
+        self.face_value_stats = face_value_stats
+        self.ratio_index = ratio_index
+        self.ratio_stats = ratio_stats
+
+    @classmethod
+    def build(cls, market_data):
+        rows = [(brand, price.get('face_value'), price['price'])
+                for brand, prices in market_data.items() for price in prices or []
+                if isinstance(price, dict) and isinstance(price.get('price'), (int, float))]
+        frame = pd.DataFrame(rows, columns=['brand', 'face_value', 'price'])
+        frame['face_value'] = pd.to_numeric(frame['face_value'], errors='coerce').astype(float)
+        frame['price'] = frame['price'].astype(float)
+
+        empty_stats = np.empty((0, len(STAT_COLUMNS)))
+        face_value_index, face_value_stats = pd.MultiIndex.from_arrays([[], []]), empty_stats
+        ratio_index, ratio_stats = pd.Index([]), empty_stats
+        quoted = frame[frame['face_value'] > 0]
+        if not quoted.empty:
+            face_value_index, face_value_stats = _group_stats(quoted.groupby(['brand', 'face_value'])['price'])
+            ratios = quoted['price'] / quoted['face_value']
+            ratio_index, ratio_stats = _group_stats(ratios.groupby(quoted['brand']))
+        return cls(face_value_index, face_value_stats, ratio_index, ratio_stats)
+
+    def lookup(self, brands, face_values):
+        """STAT_COLUMNS for each (brand, face value) pair, as an (n, len(STAT_COLUMNS)) array"""
+        brands = np.asarray(brands, dtype=object)
+        face_values = pd.to_numeric(pd.Series(face_values), errors='coerce').to_numpy(dtype=float)
+        stats = np.full((len(brands), len(STAT_COLUMNS)), np.nan)
+        stats[:, 0] = 0
+
+        found = np.zeros(len(brands), dtype=bool)
+        if len(self.face_value_index):
+            rows = self.face_value_index.get_indexer(pd.MultiIndex.from_arrays([brands, face_values]))
+            found = rows >= 0
+            stats[found] = self.face_value_stats[rows[found]]
+
+        missing = np.flatnonzero(~found & (face_values > 0))
+        if len(self.ratio_index) and len(missing):
+            rows = self.ratio_index.get_indexer(brands[missing])
+            fallback = missing[rows >= 0]
+            stats[fallback] = self.ratio_stats[rows[rows >= 0]]
+            # Ratios back to prices at each card's own face value; the count stays as is
+            stats[fallback, 1:] *= face_values[fallback, None]
+        return stats
+
+    def moved_brands(self, previous, threshold):
+        """Brands with a face value whose median price moved by more than threshold (a fraction) since previous"""
+        common = self.face_value_index.intersection(previous.face_value_index)
+        if not len(common):
+            return set()
+        median = STAT_COLUMNS.index('competitor_median')
+        old_levels = previous.face_value_stats[previous.face_value_index.get_indexer(common), median]
+        new_levels = self.face_value_stats[self.face_value_index.get_indexer(common), median]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = np.abs(new_levels - old_levels) / old_levels
+        # Face values quoted on only one side, or at a zero price, never count as moved
+        moved = np.isfinite(change) & (change > threshold)
+        return set(common.get_level_values(0)[moved])
@@ -0,0 +1,61 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger("GiftCardPricing")
+
+class DashboardWorker:
+    """Regenerates the dashboard on a background thread so pricing never waits on it.
+
+    submit() hands over a snapshot of the published updates and returns at
+    once. If a regeneration is already running, only the newest snapshot is
+    kept for the next run. Durations and failures are tracked here rather than
+    in the pricing cycle.
+    """
+
+    def __init__(self, generate):
+        self.generate = generate
+        self.runs = 0
+        self.failures = 0
+        self.last_duration = None
+        self.last_error = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dashboard-worker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, snapshot):
+        with self._lock:
+            self._snapshot = snapshot
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                snapshot, self._snapshot = self._snapshot, None
+            if snapshot is None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                self.generate(snapshot)
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"Dashboard update failed: {str(e)}")
+            self.runs += 1
+            self.last_duration = time.perf_counter() - start
+            logger.info(f"Dashboard update took {self.last_duration:.1f}s ({self.failures} failures in {self.runs} runs)")
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
@@ -0,0 +1,81 @@
+import hashlib
+import inspect
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.feather as feather
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every cached frame when the cache layout changes
+CACHE_FORMAT_VERSION = 1
+
+def file_digest(path, block_size=1 << 20):
+    """Content hash of a file, read in blocks so large histories don't need to fit in memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def feature_code_version(feature_fn):
+    """Hash of the module that defines the feature function, so code edits invalidate the cache"""
+    try:
+        source = inspect.getsource(inspect.getmodule(feature_fn))
+    except (OSError, TypeError):
+        source = f"{feature_fn.__module__}.{feature_fn.__qualname__}"
+    return hashlib.sha256(f"{CACHE_FORMAT_VERSION}:{source}".encode('utf-8')).hexdigest()
+
+class FeatureCache:
+    """Content-addressed on-disk cache of engineered feature frames.
+
+    Entries are keyed by the input file hash and the feature code version and
+    stored as uncompressed Feather (Arrow IPC) files, which are converted back
+    to pandas instead of re-parsing the CSV. The conversion copies each column
+    once; the file is memory-mapped only so the Arrow buffers aren't read into
+    memory first. File names start with a tag
+    for the input path, and only the latest entry per input path is kept.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, data_path, feature_fn):
+        data_hash = file_digest(data_path)
+        code_hash = feature_code_version(feature_fn)
+        return hashlib.sha256(f"{data_hash}:{code_hash}".encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def path_tag(data_path):
+        return hashlib.sha256(str(Path(data_path).resolve()).encode('utf-8')).hexdigest()[:12]
+
+    def _evict_stale(self, data_path, keep_path):
+        """Drop older entries for data_path, plus untagged entries from before tagging"""
+        tag = self.path_tag(data_path)
+        for path in self.cache_dir.glob('*.feather'):
+            if path != keep_path and (path.stem.startswith(f"{tag}-") or '-' not in path.stem):
+                logger.info(f"Evicting stale feature cache entry {path}")
+                path.unlink(missing_ok=True)
+
+    def load(self, data_path, feature_fn):
+        """Return the engineered frame for data_path, building and caching it on a miss"""
+        cache_path = self.cache_dir / f"{self.path_tag(data_path)}-{self.key(data_path, feature_fn)}.feather"
+
+        if cache_path.exists():
+            logger.info(f"Loading engineered features from cache {cache_path}")
+            table = feather.read_table(cache_path, memory_map=True)
+            return table.to_pandas()
+
+        logger.info(f"Feature cache miss for {data_path}, engineering features")
+        df = feature_fn(pd.read_csv(data_path)).reset_index(drop=True)
+
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = cache_path.with_suffix('.tmp')
+        feather.write_feather(df, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, cache_path)
+        self._evict_stale(data_path, cache_path)
+
+        return df
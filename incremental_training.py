@@ -0,0 +1,45 @@
+import logging
+
+import pandas as pd
+from sklearn.linear_model import SGDRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+def _iter_feature_chunks(partition_path, feature_fn, drop_columns, target, chunksize, columns=None):
+    for chunk in pd.read_csv(partition_path, chunksize=chunksize):
+        chunk = feature_fn(chunk)
+        X = chunk.drop(drop_columns, axis=1)
+        if columns is not None:
+            # Chunks may be missing categories seen elsewhere; align to the first chunk
+            X = X.reindex(columns=columns, fill_value=0)
+        yield X, chunk[target]
+
+def train_incremental_model(partition_path, feature_fn, drop_columns, target='sale_price',
+                            chunksize=100000, epochs=3, random_state=42):
+    """Fit a linear SGD model on a partition too large to load at once.
+
+    The scaler and the regressor are both fit with partial_fit, one chunk at a
+    time, so memory use is bounded by chunksize. Returns the fitted pipeline
+    and its feature columns.
+    """
+    scaler = StandardScaler()
+    columns = None
+
+    # First pass: feature scaling statistics
+    for X, _ in _iter_feature_chunks(partition_path, feature_fn, drop_columns, target, chunksize):
+        if columns is None:
+            columns = list(X.columns)
+        scaler.partial_fit(X.reindex(columns=columns, fill_value=0))
+
+    if columns is None:
+        raise ValueError(f"No rows in partition {partition_path}")
+
+    regressor = SGDRegressor(random_state=random_state)
+    for epoch in range(epochs):
+        for X, y in _iter_feature_chunks(partition_path, feature_fn, drop_columns, target, chunksize, columns):
+            regressor.partial_fit(scaler.transform(X), y)
+        logger.info(f"Incremental training pass {epoch + 1}/{epochs} done for {partition_path}")
+
+    return Pipeline([('scaler', scaler), ('regressor', regressor)]), columns
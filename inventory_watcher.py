@@ -0,0 +1,92 @@
+import logging
+import os
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger("GiftCardPricing")
+
+InventoryDelta = namedtuple('InventoryDelta', ['added', 'removed', 'changed'])
+
+class InventoryWatcher:
+    """Detects changes to the inventory CSV and diffs them by gift_card_id.
+
+    A change is noticed from the file's mtime and size, so polling is a single
+    stat call. Only when the new signature has held for two consecutive polls,
+    so the writer has finished, is the file re-read and each row hashed to work
+    out which items were added, removed or changed. Rows with a duplicate key
+    are logged and only the last one is kept.
+    """
+
+    def __init__(self, path, key='gift_card_id'):
+        self.path = Path(path)
+        self.key = key
+        self.inventory = None
+        self._signature = None
+        self._row_hashes = None
+        self._pending_signature = None
+
+    def _stat_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self):
+        signature = self._stat_signature()
+        inventory = pd.read_csv(self.path)
+        duplicated = inventory[self.key].duplicated(keep='last')
+        if duplicated.any():
+            logger.warning(f"{self.path} has {int(duplicated.sum())} rows with a duplicate {self.key}; "
+                           f"keeping the last of each")
+            inventory = inventory[~duplicated].reset_index(drop=True)
+        row_hashes = pd.Series(
+            pd.util.hash_pandas_object(inventory, index=False).values,
+            index=inventory[self.key].values
+        )
+        return signature, inventory, row_hashes
+
+    def load(self):
+        """Read the inventory and remember it as the baseline for later polls"""
+        self._signature, self.inventory, self._row_hashes = self._read()
+        return self.inventory
+
+    def poll(self):
+        """Return an InventoryDelta if the file changed since the last read, otherwise None"""
+        if self._signature is None:
+            self.load()
+            return InventoryDelta(set(self._row_hashes.index), set(), set())
+
+        try:
+            signature = self._stat_signature()
+        except FileNotFoundError:
+            # Mid-replace by the writer; try again on the next poll
+            return None
+        if signature == self._signature:
+            self._pending_signature = None
+            return None
+        if signature != self._pending_signature:
+            # Still being written, or just finished; wait for it to settle
+            self._pending_signature = signature
+            return None
+
+        self._pending_signature = None
+        try:
+            read_signature, inventory, row_hashes = self._read()
+        except Exception as e:
+            logger.error(f"Failed to read {self.path}, keeping the current inventory: {str(e)}")
+            return None
+        if read_signature != signature:
+            # Written to again since it settled; wait for the new version to settle
+            self._pending_signature = read_signature
+            return None
+        old_ids = set(self._row_hashes.index)
+        new_ids = set(row_hashes.index)
+        common = list(old_ids & new_ids)
+        changed = row_hashes[common] != self._row_hashes[common]
+
+        self._signature, self.inventory, self._row_hashes = signature, inventory, row_hashes
+        return InventoryDelta(
+            added=new_ids - old_ids,
+            removed=old_ids - new_ids,
+            changed=set(changed[changed].index)
+        )
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import joblib
 import argparse
 import logging
@@ -7,14 +8,36 @@ import json
 import time
 from datetime import datetime, timedelta
 import os
+import hashlib
+import inspect
+import zlib
+import multiprocessing
+import queue
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from pricing_model.feature_engineering import engineer_features
+from pricing_model.feature_cache import FeatureCache, feature_code_version, file_digest
+from pricing_model.partitioning import spill_partitions
+from pricing_model.incremental_training import train_incremental_model
 from pricing_model.model_selection import select_best_model
+from pricing_model.model_search import select_model_within_budget
 from pricing_model.price_adjuster import PriceAdjuster
 from pricing_model.ab_testing import ABTest
 from pricing_model.market_data import MarketDataCollector
+from pricing_model.competitor_index import STAT_COLUMNS as COMPETITOR_STAT_COLUMNS, CompetitorPriceIndex
 from pricing_model.seasonality import train_seasonality_model, predict_seasonal_effect
+from pricing_model.seasonality_table import SeasonalityTable, build_seasonality_table, save_seasonality_table
+from pricing_model.training_report import StageTimer, write_training_report
+from pricing_model.model_bundle import BUNDLE_FILE_NAME, ModelBundle, write_model_bundle
 from pricing_model.dashboard_generator import DashboardGenerator
+from pricing_model.dashboard_worker import DashboardWorker
+from pricing_model.metrics import OptimizerMetrics
+from pricing_model.price_publisher import PRICE_UPDATE_COLUMNS, PricePublisher, ShardPublisher
+from pricing_model.inventory_watcher import InventoryWatcher
+from pricing_model.model_watcher import ModelWatcher
+from pricing_model.scheduler import BrandScheduler
 
 # Set up logging
 logging.basicConfig(
@@ -27,54 +50,244 @@ logging.basicConfig(
 )
 logger = logging.getLogger("GiftCardPricing")
 
-def train_models(data_path, output_dir):
-    logger.info(f"Loading data from {data_path}")
-    df = pd.read_csv(data_path)
+# Columns that identify a sale or are the target, rather than model features
+NON_FEATURE_COLUMNS = ['gift_card_id', 'sale_date', 'sale_price', 'gift_card_type']
+
+def _save_models(gc_type, best_model, seasonality_model, features, output_dir):
+    """Dump a type's models and return its metadata entry"""
+    output_path = Path(output_dir) / f"{gc_type.lower().replace(' ', '_')}_model.pkl"
+    seasonality_path = Path(output_dir) / f"{gc_type.lower().replace(' ', '_')}_seasonality.pkl"
+    seasonality_table_path = Path(output_dir) / f"{gc_type.lower().replace(' ', '_')}_seasonality.npy"
     
-    # Feature engineering
-    df = engineer_features(df)
+    joblib.dump(best_model, output_path)
+    joblib.dump(seasonality_model, seasonality_path)
     
-    # Group by gift card type
-    gift_card_types = df['gift_card_type'].unique()
-    models = {}
+    # Precompute daily seasonal effects so inference is an array lookup
+    table_start = pd.Timestamp.now().normalize()
+    save_seasonality_table(build_seasonality_table(seasonality_model, table_start), seasonality_table_path)
     
-    for gc_type in gift_card_types:
-        logger.info(f"Training model for {gc_type}")
-        gc_data = df[df['gift_card_type'] == gc_type]
-        
+    return {
+        'model_path': str(output_path),
+        'seasonality_path': str(seasonality_path),
+        'seasonality_table_path': str(seasonality_table_path),
+        'seasonality_table_start': table_start.strftime('%Y-%m-%d'),
+        'features': list(features)
+    }
+
+def _train_gift_card_type(gc_type, gc_data, output_dir, selection_budget=None, selection_jobs=None, timer=None):
+    """Train and save the price and seasonality models for one gift card type"""
+    logger.info(f"Training model for {gc_type}")
+    timer = timer or StageTimer()
+    
+    with timer.stage('split'):
         # Prepare features and target
-        X = gc_data.drop(['gift_card_id', 'sale_date', 'sale_price', 'gift_card_type'], axis=1)
+        X = gc_data.drop(NON_FEATURE_COLUMNS, axis=1)
         y = gc_data['sale_price']
         
         # Train-validation split
         from sklearn.model_selection import train_test_split
         X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Select and train the best model
-        best_model = select_best_model(X_train, y_train, X_val, y_val)
-        
-        # Train seasonality model
+    
+    # Select and train the best model
+    with timer.stage('model_selection'):
+        if selection_budget:
+            best_model, selection = select_model_within_budget(
+                X_train, y_train, X_val, y_val, time_budget=selection_budget, n_jobs=selection_jobs
+            )
+        else:
+            from sklearn.metrics import mean_absolute_error
+            best_model = select_best_model(X_train, y_train, X_val, y_val)
+            selection = {
+                'model': type(best_model).__name__,
+                'score': float(mean_absolute_error(y_val, best_model.predict(X_val))),
+                'metric': 'mae'
+            }
+    selection['seconds'] = timer.stages['model_selection']['wall_seconds']
+    
+    # Train seasonality model
+    with timer.stage('seasonality_fit'):
         seasonality_data = gc_data[['sale_date', 'sale_price']]
         seasonality_model = train_seasonality_model(seasonality_data)
+    
+    with timer.stage('dump'):
+        metadata = _save_models(gc_type, best_model, seasonality_model, X.columns, output_dir)
+    metadata['model_selection'] = selection
+    return gc_type, metadata, timer.stages
+
+def _train_partition(gc_type, partition_path, rows, output_dir, max_partition_rows=None, chunksize=100000,
+                     selection_budget=None, selection_jobs=None):
+    """Train one gift card type from its spill file, incrementally if it is too large to load"""
+    timer = StageTimer()
+    if max_partition_rows is None or rows <= max_partition_rows:
+        with timer.stage('load'):
+            gc_data = pd.read_csv(partition_path)
+        with timer.stage('feature_engineering'):
+            gc_data = engineer_features(gc_data)
+        return _train_gift_card_type(gc_type, gc_data, output_dir, selection_budget, selection_jobs, timer)
+    
+    # Loading and feature engineering happen chunk by chunk inside the fit
+    logger.info(f"Training incremental model for {gc_type} ({rows} rows)")
+    with timer.stage('model_selection'):
+        best_model, features = train_incremental_model(
+            partition_path, engineer_features, NON_FEATURE_COLUMNS, chunksize=chunksize
+        )
+    
+    # The seasonality model only needs two columns, which fit even when the full partition doesn't
+    with timer.stage('seasonality_fit'):
+        seasonality_data = pd.read_csv(partition_path, usecols=['sale_date', 'sale_price'])
+        seasonality_model = train_seasonality_model(seasonality_data)
+    
+    with timer.stage('dump'):
+        metadata = _save_models(gc_type, best_model, seasonality_model, features, output_dir)
+    metadata['model_selection'] = {
+        'model': type(best_model[-1]).__name__,
+        'score': None,
+        'metric': 'mae',
+        'seconds': timer.stages['model_selection']['wall_seconds']
+    }
+    return gc_type, metadata, timer.stages
+
+def _fingerprint_partition(gc_data):
+    """Fingerprint a per-type partition by row count and a hash of its engineered features"""
+    row_hashes = pd.util.hash_pandas_object(gc_data, index=False)
+    return {
+        'rows': int(len(gc_data)),
+        'sha256': hashlib.sha256(row_hashes.values.tobytes()).hexdigest()
+    }
+
+def _fingerprint_spill_file(partition, code_version):
+    """Fingerprint a spill file without loading it: row count plus file and feature code hashes"""
+    digest = hashlib.sha256(f"{file_digest(partition['path'])}:{code_version}".encode('utf-8'))
+    return {
+        'rows': int(partition['rows']),
+        'sha256': digest.hexdigest()
+    }
+
+def _load_previous_metadata(output_dir):
+    """Load model metadata from the last training run, if any"""
+    metadata_path = Path(output_dir) / "model_metadata.json"
+    if not metadata_path.exists():
+        return {}
+    with open(metadata_path, 'r') as f:
+        return json.load(f)
+
+def _is_up_to_date(previous, fingerprint):
+    """Check whether a previous type entry was trained on identical data"""
+    if not previous or previous.get('fingerprint') != fingerprint:
+        return False
+    paths = [previous['model_path'], previous['seasonality_path'], previous.get('seasonality_table_path')]
+    return all(path and Path(path).exists() for path in paths)
+
+def _run_training_tasks(tasks, jobs):
+    """Run per-type training tasks, in worker processes when jobs > 1.
+
+    Returns a dict mapping each type to its metadata and stage timings.
+    """
+    results = {}
+    if jobs > 1 and len(tasks) > 1:
+        # Each type is independent, so fan them out over worker processes.
+        # Workers write their own model files; only the metadata comes back.
+        logger.info(f"Training {len(tasks)} gift card types with {jobs} workers")
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(fn, *args) for fn, args in tasks.values()]
+            for future in as_completed(futures):
+                gc_type, metadata, stages = future.result()
+                results[gc_type] = (metadata, stages)
+    else:
+        for fn, args in tasks.values():
+            gc_type, metadata, stages = fn(*args)
+            results[gc_type] = (metadata, stages)
+    return results
+
+def train_models(data_path, output_dir, jobs=1, full_retrain=False, feature_cache_dir=None,
+                 chunksize=None, max_partition_rows=None, selection_budget=None):
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    timer = StageTimer()
+    
+    # Only retrain types whose data changed since the last run
+    previous_models = {} if full_retrain else _load_previous_metadata(output_dir)
+    models = {}
+    fingerprints = {}
+    tasks = {}
+    spill_dir = None
+    # Share the cores between training workers so model search threads don't oversubscribe them
+    selection_jobs = max(1, (os.cpu_count() or 1) // jobs)
+    
+    if chunksize:
+        # Out-of-core: split the history into per-type spill files one chunk at a time
+        logger.info(f"Streaming {data_path} in chunks of {chunksize} rows")
+        with timer.stage('partition'):
+            spill_dir = tempfile.mkdtemp(prefix='spill-', dir=output_dir)
+            partitions = spill_partitions(data_path, spill_dir, chunksize=chunksize)
+        gift_card_types = list(partitions)
+        code_version = feature_code_version(engineer_features)
         
-        # Save models
-        output_path = Path(output_dir) / f"{gc_type.lower().replace(' ', '_')}_model.pkl"
-        seasonality_path = Path(output_dir) / f"{gc_type.lower().replace(' ', '_')}_seasonality.pkl"
+        with timer.stage('fingerprint'):
+            for gc_type, partition in partitions.items():
+                fingerprints[gc_type] = _fingerprint_spill_file(partition, code_version)
+                tasks[gc_type] = (_train_partition, (
+                    gc_type, str(partition['path']), partition['rows'], output_dir, max_partition_rows, chunksize,
+                    selection_budget, selection_jobs
+                ))
+    else:
+        logger.info(f"Loading data from {data_path}")
+        if feature_cache_dir:
+            # Reuse engineered features from a previous run on identical input
+            with timer.stage('load_cached_features'):
+                df = FeatureCache(feature_cache_dir).load(data_path, engineer_features)
+        else:
+            with timer.stage('load'):
+                df = pd.read_csv(data_path)
+            
+            # Feature engineering
+            with timer.stage('feature_engineering'):
+                df = engineer_features(df)
         
-        joblib.dump(best_model, output_path)
-        joblib.dump(seasonality_model, seasonality_path)
+        # Group by gift card type
+        gift_card_types = df['gift_card_type'].unique()
         
-        models[gc_type] = {
-            'model_path': str(output_path),
-            'seasonality_path': str(seasonality_path),
-            'features': list(X.columns)
-        }
+        with timer.stage('fingerprint'):
+            for gc_type in gift_card_types:
+                gc_data = df[df['gift_card_type'] == gc_type]
+                fingerprints[gc_type] = _fingerprint_partition(gc_data)
+                tasks[gc_type] = (_train_gift_card_type, (gc_type, gc_data, output_dir, selection_budget, selection_jobs))
+    
+    skipped_types = []
+    for gc_type in list(tasks):
+        if _is_up_to_date(previous_models.get(gc_type), fingerprints[gc_type]):
+            logger.info(f"Skipping {gc_type}: data unchanged since last training run")
+            models[gc_type] = previous_models[gc_type]
+            skipped_types.append(gc_type)
+            del tasks[gc_type]
+    
+    try:
+        with timer.stage('train'):
+            trained = _run_training_tasks(tasks, jobs)
+    finally:
+        if spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+    
+    type_stages = {}
+    for gc_type, (metadata, stages) in trained.items():
+        metadata['fingerprint'] = fingerprints[gc_type]
+        models[gc_type] = metadata
+        type_stages[gc_type] = stages
+    
+    # Keep metadata ordering stable regardless of completion order
+    models = {gc_type: models[gc_type] for gc_type in gift_card_types}
+    
+    # Single-file bundle so the optimizer can start without one unpickle per type.
+    # Written before the metadata so a reader never pairs new metadata with an old bundle.
+    with timer.stage('bundle'):
+        write_model_bundle(models, output_dir)
     
     # Save model metadata
     with open(Path(output_dir) / "model_metadata.json", 'w') as f:
         json.dump(models, f, indent=2)
     
-    logger.info(f"Models trained and saved to {output_dir}")
+    write_training_report(output_dir, started_at, timer.stages, type_stages, skipped_types)
+    
+    logger.info(f"Models trained and saved to {output_dir} ({len(trained)} retrained, {len(models) - len(trained)} unchanged)")
     return models
 
 def update_dashboard(data_dir, dashboard_dir=None):
@@ -86,134 +299,497 @@ def update_dashboard(data_dir, dashboard_dir=None):
     generator = DashboardGenerator(data_dir, dashboard_dir)
     generator.generate_dashboard()
     
-    # Record price history for dashboard
-    price_history_file = Path(data_dir) / "price_update_history.csv"
-    
     return dashboard_dir
 
-def run_price_optimization(config_path, data_dir):
+def _update_dashboard_from_snapshot(data_dir, snapshot_df, metrics):
+    """Regenerate the dashboard and store the snapshot of published updates it was built from"""
+    try:
+        with metrics.stage_seconds.time(stage='dashboard_refresh'):
+            dashboard_dir = update_dashboard(data_dir)
+            snapshot_df.to_csv(Path(dashboard_dir) / "data" / "price_updates.csv", index=False)
+    except Exception:
+        metrics.dashboard_failures.inc()
+        raise
+
+def _adjust_prices_batch(adjuster, items):
+    """Get optimal prices for a per-type slice of the inventory in one model call"""
+    if hasattr(adjuster, 'adjust_prices'):
+        return np.asarray(adjuster.adjust_prices(items), dtype=float)
+    # Adjusters without a batch API still avoid the per-row Series overhead of iterrows
+    return np.array([adjuster.adjust_price(item_data) for item_data in items.to_dict('records')], dtype=float)
+
+def _needs_competitor_prices(adjuster):
+    """Whether the adjuster reads the raw competitor price lists rather than the stat columns.
+
+    Adjusters can say so with a needs_competitor_prices attribute. Otherwise
+    per-record adjusters are assumed to need the lists, as they always had them,
+    and batch adjusters to work from the stat columns.
+    """
+    return getattr(adjuster, 'needs_competitor_prices', not hasattr(adjuster, 'adjust_prices'))
+
+def _price_inventory(inventory_df, adjusters, market_data, seasonal_effects, ab_test, metrics):
+    """Price every inventory item that has an adjuster for its type and return the updates"""
+    priced = []
+    # Competitor statistics for the brands being priced, computed once rather than per card
+    with metrics.stage_seconds.time(stage='competitor_index'):
+        competitor_index = CompetitorPriceIndex.build(
+            {brand: market_data.get(brand, []) for brand in inventory_df['brand'].unique()}
+        )
+    for gc_type, items in inventory_df.groupby('gift_card_type', sort=False):
+        if gc_type not in adjusters:
+            metrics.items_skipped.inc(len(items), reason='no_adjuster')
+            continue
+        
+        # Attach market information for the whole slice, competitor stats as array lookups
+        face_values = items['face_value'].to_numpy() if 'face_value' in items else np.full(len(items), np.nan)
+        competitor_stats = competitor_index.lookup(items['brand'].to_numpy(), face_values)
+        items = items.assign(
+            seasonal_effect=seasonal_effects.get(gc_type),
+            **dict(zip(COMPETITOR_STAT_COLUMNS, competitor_stats.T))
+        )
+        if _needs_competitor_prices(adjusters[gc_type]):
+            items['competitor_prices'] = pd.Series([market_data.get(brand, []) for brand in items['brand']],
+                                                   index=items.index, dtype=object)
+        with metrics.inference_seconds.time(gift_card_type=gc_type):
+            optimal_prices = _adjust_prices_batch(adjusters[gc_type], items)
+        
+        # Apply A/B testing
+        current_prices = items['current_price'].to_numpy(dtype=float)
+        with metrics.stage_seconds.time(stage='ab_assignment'):
+            final_prices = ab_test.get_prices(items['gift_card_id'].to_numpy(), optimal_prices, current_prices)
+        metrics.items_priced.inc(len(items))
+        
+        priced.append(pd.DataFrame({
+            'gift_card_id': items['gift_card_id'].to_numpy(),
+            'old_price': current_prices,
+            'new_price': final_prices
+        }))
+    
+    if not priced:
+        return pd.DataFrame(columns=PRICE_UPDATE_COLUMNS)
+    
+    changes_df = pd.concat(priced, ignore_index=True)
+    changes_df['change'] = changes_df['new_price'] - changes_df['old_price']
+    changes_df['change_percentage'] = changes_df['change'] / changes_df['old_price'] * 100
+    return changes_df
+
+def _seasonal_effects(seasonality_tables):
+    """Today's seasonal effect per gift card type; only depends on the date, so one lookup per type"""
+    today = pd.Timestamp.now()
+    return {gc_type: table.effect(today) for gc_type, table in seasonality_tables.items()}
+
+def _adjuster_accepts_model():
+    """Whether PriceAdjuster can be handed an already loaded model instead of unpickling its own file"""
+    return 'model' in inspect.signature(PriceAdjuster).parameters
+
+def _load_models(data_dir, config_path):
+    """Build price adjusters and seasonality tables for every trained gift card type"""
+    adjusters = {}
+    seasonality_tables = {}
+    bundle_path = Path(data_dir) / BUNDLE_FILE_NAME
+    bundle = None
+    # The bundle only pays off if adjusters take its models; otherwise each would be unpickled twice
+    if bundle_path.exists() and _adjuster_accepts_model():
+        # One memory-mapped load for every type; pages are shared through the OS cache
+        try:
+            bundle = ModelBundle.load(bundle_path)
+        except ValueError as e:
+            logger.warning(f"Ignoring model bundle, loading models one by one: {str(e)}")
+    
+    if bundle is not None:
+        # Everything comes from the bundle so a half-written training run can't mix in
+        for gc_type in bundle.types:
+            adjusters[gc_type] = PriceAdjuster(bundle.model_path(gc_type), config_path, model=bundle.model(gc_type))
+            table = bundle.seasonality_table(gc_type)
+            if table is not None:
+                seasonality_tables[gc_type] = table
+    else:
+        with open(Path(data_dir) / "model_metadata.json", 'r') as f:
+            model_metadata = json.load(f)
+        for gc_type, metadata in model_metadata.items():
+            adjusters[gc_type] = PriceAdjuster(metadata['model_path'], config_path)
+            if 'seasonality_table_path' in metadata:
+                seasonality_tables[gc_type] = SeasonalityTable.load(
+                    metadata['seasonality_table_path'], metadata['seasonality_table_start']
+                )
+    
+    return adjusters, seasonality_tables
+
+def _shard_of(value, shard_count):
+    # crc32 rather than hash() so every process agrees on the assignment
+    return zlib.crc32(str(value).encode('utf-8')) % shard_count
+
+def _shard_rows(inventory_df, shard_index, shard_count, shard_key='brand'):
+    """Rows of the inventory owned by one shard"""
+    if shard_count <= 1:
+        return inventory_df
+    shards = inventory_df[shard_key].map(lambda value: _shard_of(value, shard_count))
+    return inventory_df[shards == shard_index]
+
+def _scheduled_brands(full_inventory_df, inventory_df, shard_index, shard_count, shared_market_data=None):
+    """Brands this process reprices, plus the brands it collects for other shards when they share market data"""
+    brands = list(inventory_df['brand'].unique())
+    if shared_market_data is not None:
+        in_shard = set(brands)
+        brands += [brand for brand in full_inventory_df['brand'].unique()
+                   if brand not in in_shard and _shard_of(brand, shard_count) == shard_index]
+    return brands
+
+def _collect_market_data(market_collector, brands, shard_index, shard_count, shared_market_data=None):
+    """Competitor prices for brands; with shared market data each brand is collected by its owning shard only"""
+    if shared_market_data is None:
+        return market_collector.collect_competitor_prices(brands)
+    
+    owned = [brand for brand in brands if _shard_of(brand, shard_count) == shard_index]
+    borrowed = {}
+    for brand in brands:
+        if brand not in owned:
+            prices = shared_market_data.get(brand)
+            if prices is not None:
+                borrowed[brand] = prices
+    # Brands their owner hasn't collected yet (e.g. at startup) are fetched here once
+    fetch = owned + [brand for brand in brands if brand not in owned and brand not in borrowed]
+    collected = dict(market_collector.collect_competitor_prices(fetch)) if fetch else {}
+    shared_market_data.update({brand: collected[brand] for brand in owned})
+    collected.update(borrowed)
+    return collected
+
+def run_price_optimization(config_path, data_dir, shard_index=0, shard_count=1, results_queue=None,
+                           shared_market_data=None):
     with open(config_path, 'r') as f:
         config = json.load(f)
+    shard_key = config.get('shard_key', 'brand')
     
-    # Load model metadata
-    with open(Path(data_dir) / "model_metadata.json", 'r') as f:
-        model_metadata = json.load(f)
+    # Cycle metrics, exported in the Prometheus text format
+    metrics = OptimizerMetrics(config, shard_index if results_queue is not None else None)
     
     # Initialize market data collector
-    market_collector = MarketDataCollector(config_path)
+    market_collector = MarketDataCollector(
+        config_path, shard_index if results_queue is not None else None, shard_count=shard_count
+    )
     
     # Initialize price adjusters for each gift card type
-    adjusters = {}
-    for gc_type, metadata in model_metadata.items():
-        adjusters[gc_type] = PriceAdjuster(metadata['model_path'], config_path)
+    adjusters, seasonality_tables = _load_models(data_dir, config_path)
+    
+    # Load retrained models in the background and swap them in between cycles
+    model_watcher = ModelWatcher(
+        [Path(data_dir) / "model_metadata.json", Path(data_dir) / BUNDLE_FILE_NAME],
+        lambda: _load_models(data_dir, config_path),
+        poll_seconds=config.get('model_poll_seconds', 60)
+    ).start()
     
     # Initialize A/B testing
     ab_test = ABTest("price_optimization_v1", experiment_duration_days=14)
     
-    # Load current inventory
-    inventory_df = pd.read_csv(Path(data_dir) / "current_inventory.csv")
+    # Load current inventory; changes to the file are picked up while the loop runs
+    inventory_watcher = InventoryWatcher(Path(data_dir) / "current_inventory.csv")
+    full_inventory_df = inventory_watcher.load()
+    inventory_df = _shard_rows(full_inventory_df, shard_index, shard_count, shard_key)
+    inventory_poll_seconds = config.get('inventory_poll_seconds', 30)
+    
+    # Shard workers hand their updates to the coordinator, which owns the published files
+    if results_queue is not None:
+        publisher = ShardPublisher(results_queue, shard_index)
+    else:
+        publisher = PricePublisher(data_dir, config)
     
-    # Initialize dashboard update timer
+    # Initialize dashboard update timer; regeneration runs off the pricing thread
     last_dashboard_update = datetime.now()
     dashboard_update_interval = timedelta(hours=config.get('dashboard_update_interval_hours', 6))
+    dashboard_worker = None
+    if results_queue is None:
+        dashboard_worker = DashboardWorker(
+            lambda snapshot_df: _update_dashboard_from_snapshot(data_dir, snapshot_df, metrics)
+        ).start()
+    
+    # Reprice brands on a per-brand schedule, staggered across the update interval
+    brand_intervals = {
+        brand: minutes * 60 for brand, minutes in config.get('brand_update_interval_minutes', {}).items()
+    }
+    scheduled_brands = _scheduled_brands(full_inventory_df, inventory_df, shard_index, shard_count, shared_market_data)
+    scheduler = BrandScheduler(
+        scheduled_brands,
+        config['update_interval_minutes'] * 60,
+        brand_intervals,
+        stagger=config.get('stagger_brands', True)
+    )
+    
+    # Optional competitor checks between repricings; a brand whose competitors move is repriced at once
+    market_checks = None
+    if config.get('market_check_interval_minutes'):
+        market_checks = BrandScheduler(scheduled_brands, config['market_check_interval_minutes'] * 60)
+    competitor_change_threshold = config.get('competitor_change_threshold', 0.02)
+    market_data = {}
+    # Brands popped from the schedule but not yet published; made due again if the cycle fails
+    unpublished_brands = []
     
     while True:
         try:
-            # Collect latest market data
-            gift_card_brands = inventory_df['brand'].unique().tolist()
-            market_data = market_collector.collect_competitor_prices(gift_card_brands)
+            reloaded = model_watcher.take()
+            if reloaded is not None:
+                adjusters, seasonality_tables = reloaded
+                logger.info(f"Swapped in newly trained models for {len(adjusters)} gift card types")
             
-            # Update prices for each item in inventory
-            updated_prices = []
+            cycle_start = time.perf_counter()
+            due_brands = scheduler.pop_due()
+            unpublished_brands = due_brands
             
-            for _, item in inventory_df.iterrows():
-                gc_type = item['gift_card_type']
-                
-                if gc_type in adjusters:
-                    # Prepare item data with market information
-                    item_data = item.to_dict()
-                    item_data['competitor_prices'] = market_data.get(item['brand'], [])
-                    
-                    # Get optimal price
-                    optimal_price = adjusters[gc_type].adjust_price(item_data)
-                    
-                    # Apply A/B testing
-                    final_price = ab_test.get_price(
-                        item['gift_card_id'], 
-                        optimal_price,
-                        item['current_price']
+            # Check competitors of brands that are not due anyway
+            fresh_market_data = {}
+            if market_checks is not None:
+                check_brands = [brand for brand in market_checks.pop_due() if brand not in due_brands]
+                if check_brands:
+                    with metrics.stage_seconds.time(stage='market_collection'):
+                        fresh_market_data = _collect_market_data(
+                            market_collector, check_brands, shard_index, shard_count, shared_market_data
+                        )
+                    checked = list(fresh_market_data)
+                    moved = CompetitorPriceIndex.build(fresh_market_data).moved_brands(
+                        CompetitorPriceIndex.build({brand: market_data.get(brand, []) for brand in checked}),
+                        competitor_change_threshold
                     )
-                    
-                    updated_prices.append({
-                        'gift_card_id': item['gift_card_id'],
-                        'old_price': item['current_price'],
-                        'new_price': final_price,
-                        'change': final_price - item['current_price'],
-                        'change_percentage': ((final_price - item['current_price']) / item['current_price']) * 100
-                    })
-            
-            # Log price changes
-            changes_df = pd.DataFrame(updated_prices)
-            logger.info(f"Price updates generated: {len(changes_df)} items")
-            logger.info(f"Average change: {changes_df['change_percentage'].mean():.2f}%")
-            
-            # Save updates to file for API to pick up
-            changes_df.to_csv(Path(data_dir) / "price_updates.csv", index=False)
-            
-            # Update price history for dashboard
-            price_history_file = Path(data_dir) / "price_update_history.csv"
-            if price_history_file.exists():
-                history_df = pd.read_csv(price_history_file)
-                # Add timestamp column if it doesn't exist
-                if 'timestamp' not in history_df.columns:
-                    history_df['timestamp'] = pd.Timestamp.now().isoformat()
-                # Append new changes
-                history_df = pd.concat([history_df, changes_df.assign(timestamp=pd.Timestamp.now().isoformat())], ignore_index=True)
-            else:
-                history_df = changes_df.assign(timestamp=pd.Timestamp.now().isoformat())
+                    for brand in sorted(moved):
+                        logger.info(f"Competitor prices for {brand} moved, repricing now")
+                        scheduler.trigger(brand)
+                    market_data.update(fresh_market_data)
+                    due_brands += scheduler.pop_due()
+                    unpublished_brands = due_brands
             
-            # Save updated history
-            history_df.to_csv(price_history_file, index=False)
+            if due_brands:
+                # Collect latest market data for due brands not just checked
+                collect_brands = [brand for brand in due_brands if brand not in fresh_market_data]
+                if collect_brands:
+                    with metrics.stage_seconds.time(stage='market_collection'):
+                        market_data.update(_collect_market_data(
+                            market_collector, collect_brands, shard_index, shard_count, shared_market_data
+                        ))
+                
+                # Price each gift card type's slice of the due brands' inventory in one batch
+                due_items = inventory_df[inventory_df['brand'].isin(due_brands)]
+                changes_df = _price_inventory(
+                    due_items, adjusters, market_data, _seasonal_effects(seasonality_tables), ab_test, metrics
+                )
+                
+                # Log price changes
+                logger.info(f"Price updates generated for {len(due_brands)} brands: {len(changes_df)} items")
+                logger.info(f"Average change: {changes_df['change_percentage'].mean():.2f}%")
+                
+                with metrics.stage_seconds.time(stage='file_writes'):
+                    publisher.publish(changes_df)
+                unpublished_brands = []
+                metrics.cycle_finished(time.perf_counter() - cycle_start)
             
             # Update dashboard if interval has passed
             current_time = datetime.now()
-            if current_time - last_dashboard_update > dashboard_update_interval:
-                update_dashboard(data_dir)
+            if dashboard_worker is not None and current_time - last_dashboard_update > dashboard_update_interval:
+                # latest_updates is replaced on every publish, never mutated, so it is a stable snapshot
+                dashboard_worker.submit(publisher.latest_updates)
                 last_dashboard_update = current_time
             
-            # Sleep until next cycle
-            logger.info(f"Sleeping for {config['update_interval_minutes']} minutes")
-            time.sleep(config['update_interval_minutes'] * 60)
+            publisher.flush()
+            metrics.flush()
+            
+            # Sleep until the next brand is due, repricing only items that change in the inventory meanwhile
+            wake_times = [scheduler.next_due()]
+            if market_checks is not None:
+                wake_times.append(market_checks.next_due())
+            wake_times = [wake_time for wake_time in wake_times if wake_time is not None]
+            next_wake = min(wake_times) if wake_times else time.monotonic() + inventory_poll_seconds
+            while time.monotonic() < next_wake:
+                time.sleep(max(0, min(inventory_poll_seconds, next_wake - time.monotonic())))
+                publisher.flush()
+                delta = inventory_watcher.poll()
+                if delta is None:
+                    continue
+                
+                full_inventory_df = inventory_watcher.inventory
+                inventory_df = _shard_rows(full_inventory_df, shard_index, shard_count, shard_key)
+                affected = inventory_df[inventory_df['gift_card_id'].isin(delta.added | delta.changed)]
+                logger.info(f"Inventory changed: {len(delta.added)} added, {len(delta.removed)} removed, "
+                            f"{len(delta.changed)} changed")
+                
+                # Keep the schedules in step with the brands in stock
+                brands = _scheduled_brands(full_inventory_df, inventory_df, shard_index, shard_count, shared_market_data)
+                scheduler.sync(brands)
+                if market_checks is not None:
+                    market_checks.sync(brands)
+                
+                # Brands new to the inventory have no market data yet
+                new_brands = [brand for brand in affected['brand'].unique() if brand not in market_data]
+                if new_brands:
+                    with metrics.stage_seconds.time(stage='market_collection'):
+                        market_data.update(_collect_market_data(
+                            market_collector, new_brands, shard_index, shard_count, shared_market_data
+                        ))
+                
+                changes_df = _price_inventory(
+                    affected, adjusters, market_data, _seasonal_effects(seasonality_tables), ab_test, metrics
+                )
+                with metrics.stage_seconds.time(stage='file_writes'):
+                    publisher.publish(changes_df, removed_ids=delta.removed)
+                metrics.flush()
+                
+                # Inventory repricing can take a while; don't oversleep a due brand
+                next_due = scheduler.next_due()
+                if next_due is not None:
+                    next_wake = min(next_wake, next_due)
             
         except KeyboardInterrupt:
             logger.info("Optimization process interrupted by user")
             break
         except Exception as e:
             logger.error(f"Error in optimization cycle: {str(e)}")
+            metrics.cycle_errors.inc()
+            # Retry the failed brands after the sleep instead of a whole interval later
+            for brand in unpublished_brands:
+                scheduler.trigger(brand)
+            unpublished_brands = []
             time.sleep(60)  # Sleep and retry
     
     # Clean up
+    publisher.flush(force=True)
+    if dashboard_worker is not None:
+        dashboard_worker.stop()
+    model_watcher.stop()
     market_collector.close()
+    metrics.close()
     logger.info("Price optimization process completed")
 
+def run_sharded_optimization(config_path, data_dir, shards):
+    """Run one optimizer process per shard and publish their merged updates from this process"""
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    
+    # Spawned rather than forked: this process runs threads (dashboard, metrics) that
+    # a forked child would inherit mid-flight, locks and all
+    context = multiprocessing.get_context('spawn')
+    results_queue = context.Queue()
+    
+    # Sharding by anything but brand puts a brand's cards on several shards. Each brand's
+    # competitor prices are then collected by one owning shard and shared with the rest.
+    manager = None
+    shared_market_data = None
+    if config.get('shard_key', 'brand') != 'brand':
+        manager = context.Manager()
+        shared_market_data = manager.dict()
+    
+    def start_worker(shard_index):
+        started_at[shard_index] = time.monotonic()
+        worker = context.Process(
+            target=run_price_optimization,
+            args=(config_path, data_dir, shard_index, shards, results_queue, shared_market_data),
+            name=f"optimizer-shard-{shard_index}",
+            daemon=True
+        )
+        worker.start()
+        return worker
+    
+    started_at = [0.0] * shards
+    workers = [start_worker(shard_index) for shard_index in range(shards)]
+    # Consecutive quick exits per shard and when each dead shard may be restarted
+    restart_failures = [0] * shards
+    restart_at = [None] * shards
+    max_restart_delay = config.get('shard_max_restart_delay_seconds', 300)
+    logger.info(f"Started {shards} optimizer shards by {config.get('shard_key', 'brand')}")
+    
+    publisher = PricePublisher(data_dir, config)
+    metrics = OptimizerMetrics(config)
+    last_dashboard_update = datetime.now()
+    dashboard_update_interval = timedelta(hours=config.get('dashboard_update_interval_hours', 6))
+    dashboard_worker = DashboardWorker(
+        lambda snapshot_df: _update_dashboard_from_snapshot(data_dir, snapshot_df, metrics)
+    ).start()
+    
+    while True:
+        try:
+            try:
+                shard_index, changes_df, removed_ids = results_queue.get(timeout=5)
+                with metrics.stage_seconds.time(stage='file_writes'):
+                    publisher.publish(changes_df, removed_ids=removed_ids)
+            except queue.Empty:
+                pass
+            
+            # Replace shards that died so their brands keep getting priced, backing off
+            # exponentially while a shard keeps exiting soon after it starts
+            for shard_index, worker in enumerate(workers):
+                if worker.is_alive():
+                    continue
+                now = time.monotonic()
+                if restart_at[shard_index] is None:
+                    if now - started_at[shard_index] > max_restart_delay:
+                        restart_failures[shard_index] = 0
+                    delay = min(max_restart_delay, 5 * 2 ** restart_failures[shard_index])
+                    restart_failures[shard_index] += 1
+                    restart_at[shard_index] = now + delay
+                    logger.error(f"Optimizer shard {shard_index} exited with code {worker.exitcode}, "
+                                 f"restarting in {delay}s")
+                elif now >= restart_at[shard_index]:
+                    restart_at[shard_index] = None
+                    workers[shard_index] = start_worker(shard_index)
+            
+            # Update dashboard if interval has passed
+            current_time = datetime.now()
+            if current_time - last_dashboard_update > dashboard_update_interval:
+                dashboard_worker.submit(publisher.latest_updates)
+                last_dashboard_update = current_time
+            
+            publisher.flush()
+            metrics.flush()
+            
+        except KeyboardInterrupt:
+            logger.info("Optimization process interrupted by user")
+            break
+        except Exception as e:
+            logger.error(f"Error publishing shard updates: {str(e)}")
+            metrics.cycle_errors.inc()
+    
+    # Clean up
+    publisher.flush(force=True)
+    dashboard_worker.stop()
+    metrics.close()
+    for worker in workers:
+        worker.terminate()
+        worker.join()
+    if manager is not None:
+        manager.shutdown()
+    logger.info("Sharded price optimization completed")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Gift Card Price Optimization System")
     parser.add_argument('--train', action='store_true', help='Train new models')
     parser.add_argument('--optimize', action='store_true', help='Run price optimization')
     parser.add_argument('--data-path', type=str, default='data/historical_sales.csv', help='Path to training data')
     parser.add_argument('--output-dir', type=str, default='models', help='Directory to save models')
+    parser.add_argument('--feature-cache-dir', type=str, default=None, help='Directory for cached engineered features')
+    parser.add_argument('--chunksize', type=int, default=None, help='Stream training data in chunks of this many rows')
+    parser.add_argument('--max-partition-rows', type=int, default=None, help='Train types with more rows than this incrementally (requires --chunksize)')
+    parser.add_argument('--selection-budget', type=float, default=None, help='Seconds per gift card type for a parallel successive-halving model search')
+    parser.add_argument('--full-retrain', action='store_true', help='Retrain every gift card type, even if its data is unchanged')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes for training')
+    parser.add_argument('--shards', type=int, default=1, help='Number of optimizer worker processes, each owning a shard of the inventory')
     parser.add_argument('--config', type=str, default='config/pricing_config.json', help='Configuration file path')
     parser.add_argument('--data-dir', type=str, default='data', help='Data directory for current inventory and updates')
     parser.add_argument('--update-dashboard', action='store_true', help='Update the dashboard')
     parser.add_argument('--dashboard-dir', type=str, default=None, help='Dashboard output directory')
     
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.feature_cache_dir is not None and args.chunksize is not None:
+        parser.error("--feature-cache-dir can't be combined with --chunksize")
+    if args.max_partition_rows is not None and args.chunksize is None:
+        parser.error("--max-partition-rows requires --chunksize")
     
     if args.train:
-        train_models(args.data_path, args.output_dir)
+        train_models(args.data_path, args.output_dir, jobs=args.jobs, full_retrain=args.full_retrain,
+                     feature_cache_dir=args.feature_cache_dir, chunksize=args.chunksize,
+                     max_partition_rows=args.max_partition_rows, selection_budget=args.selection_budget)
     
     if args.optimize:
-        run_price_optimization(args.config, args.data_dir)
+        if args.shards > 1:
+            run_sharded_optimization(args.config, args.data_dir, args.shards)
+        else:
+            run_price_optimization(args.config, args.data_dir)
     
     if args.update_dashboard:
         update_dashboard(args.data_dir, args.dashboard_dir) 
\ No newline at end of file
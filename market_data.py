@@ -2,14 +2,58 @@ from proxy_ethica import ProxySession, RobotsParser
 import requests
 import pandas as pd
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from pricing_model.circuit_breaker import SourceHealth
+from pricing_model.market_recorder import RecordingSession, ReplayRobotsParser, ReplaySession
+from pricing_model.rate_limiter import HostRateLimiter
+from pricing_model.response_cache import ResponseCache
+from pricing_model.robots_cache import RobotsCache
+
+class MarketData(dict):
+    """{brand: [prices]} from one collection; stale_brands fell back to their last known prices"""
+
+    def __init__(self, prices, stale_brands=()):
+        super().__init__(prices)
+        self.stale_brands = list(stale_brands)
 
 class MarketDataCollector:
-    def __init__(self, config_path):
+    def __init__(self, config_path, shard_index=None, shard_count=1):
         with open(config_path, 'r') as f:
             self.config = json.load(f)
+        self.shard_index = shard_index
         self.proxy_session = None
+        # 'live', 'record' (live, archiving every response) or 'replay' (served from the archive)
+        self.mode = self.config.get('market_data_mode', 'live')
+        self.archive_path = self.config.get('market_archive_path', 'market_archive.jsonl')
+        # Parsed robots.txt rules are shared across brands and cycles until they expire
+        robots_parser = ReplayRobotsParser if self.mode == 'replay' else RobotsParser
+        self.robots_cache = RobotsCache(robots_parser, ttl_seconds=self.config.get('robots_cache_ttl_seconds', 3600))
+        # Parsed responses, revalidated with conditional requests once they go stale
+        response_cache_path = self.config.get('response_cache_path')
+        if response_cache_path and shard_index is not None:
+            # Each shard keeps its own cache rather than overwriting the others'
+            response_cache_path = f"{response_cache_path}.shard-{shard_index}"
+        self.response_cache = ResponseCache(
+            max_entries=self.config.get('response_cache_max_entries', 1024),
+            path=response_cache_path
+        )
+        # Per-host politeness budget, split between shards; hosts never wait on each other
+        self.rate_limiter = HostRateLimiter(self.config.get('rate_limits'), shares=shard_count)
+        # Sources that keep failing are skipped until their breaker lets a probe through
+        self.source_health = SourceHealth(
+            failure_threshold=self.config.get('circuit_failure_threshold', 3),
+            reset_seconds=self.config.get('circuit_reset_seconds', 300)
+        )
+        self._last_prices = {}
         
     def initialize_proxy(self):
+        if self.mode == 'replay':
+            self.proxy_session = ReplaySession(self.archive_path, self.config.get('replay_latency_scale', 1.0))
+            return
+        
         # Create a new proxy session with proper fallback strategies
         self.proxy_session = ProxySession(
             country=self.config['proxy_country'],
@@ -21,60 +65,174 @@ class MarketDataCollector:
             respect_robots_txt=True,
             track_bandwidth=True
         )
+        if self.mode == 'record':
+            self.proxy_session = RecordingSession(self.proxy_session, self.archive_path)
         
-    def collect_competitor_prices(self, gift_card_brands):
-        if not self.proxy_session:
-            self.initialize_proxy()
-            
-        results = {}
-        
+    def _sources_for(self, brand):
+        return self.config['data_sources'].get(brand, self.config['data_sources']['default'])
+    
+    def _plan_requests(self, gift_card_brands):
+        """(brands, source) pairs to fetch: one per brand, or chunks of brands for batch-capable sources"""
+        plan = []
+        batches = {}
         for brand in gift_card_brands:
-            sources = self.config['data_sources'].get(brand, self.config['data_sources']['default'])
-            brand_prices = []
+            for source in self._sources_for(brand):
+                if not source.get('batch'):
+                    plan.append(([brand], source))
+                    continue
+                key = (source['base_url'], source['endpoint'])
+                if key not in batches:
+                    batches[key] = ([], source)
+                    plan.append(batches[key])
+                batches[key][0].append(brand)
+        
+        chunked = []
+        for brands, source in plan:
+            size = source.get('batch_size', 50) if source.get('batch') else 1
+            chunked.extend((brands[i:i + size], source) for i in range(0, len(brands), size))
+        return chunked
+    
+    def _request_params(self, brands, source):
+        if source.get('batch'):
+            return {source.get('batch_param', 'brands'): ','.join(brands), 'format': 'json'}
+        return {'brand': brands[0], 'format': 'json'}
+    
+    def _split_prices(self, brands, source, prices):
+        """Split a response's prices into {brand: [prices]}"""
+        if not source.get('batch'):
+            return {brands[0]: list(prices)}
+        # Batched sources return prices keyed by brand, or a flat list tagged with the brand
+        if isinstance(prices, dict):
+            return {brand: list(prices.get(brand, [])) for brand in brands}
+        by_brand = {brand: [] for brand in brands}
+        for price in prices:
+            if price.get('brand') in by_brand:
+                by_brand[price['brand']].append(price)
+        return by_brand
+    
+    def _fetch_source(self, brands, source):
+        """Fetch brands' prices from one source, trying its fallback endpoint on error.
+
+        Returns None when the source is skipped by its circuit breaker or fails.
+        """
+        brand_prices = {brand: [] for brand in brands}
+        breaker = self.source_health.breaker(source)
+        try:
+            url = f"{source['base_url']}{source['endpoint']}"
+            params = self._request_params(brands, source)
+            cached_prices = self.response_cache.fresh_prices(url, params)
+            if cached_prices is not None:
+                return self._split_prices(brands, source, cached_prices)
+            
+            # Checked before robots.txt, whose fetch would also wait on a dead host
+            if not breaker.allow():
+                return None
+            
+            # Check if scraping is allowed by robots.txt
+            if not self.robots_cache.can_fetch(source['base_url'], source['endpoint']):
+                print(f"Scraping not allowed for {source['base_url']}")
+                breaker.record_success()
+                return brand_prices
             
-            for source in sources:
+            # Wait only as long as this host's rate limit requires; replays are paced by their recorded latency
+            if self.mode != 'replay':
+                self.rate_limiter.acquire(urlparse(source['base_url']).netloc)
+            
+            # Make the request with a clean user agent, revalidating any cached response
+            headers = {'User-Agent': self.proxy_session.get_random_user_agent()}
+            headers.update(self.response_cache.conditional_headers(url, params))
+            response = self.proxy_session.get(url, params=params, headers=headers)
+            
+            if response.status_code == 304:
+                cached_prices = self.response_cache.not_modified(url, params, response.headers)
+                if cached_prices is not None:
+                    brand_prices = self._split_prices(brands, source, cached_prices)
+            elif response.status_code == 200:
+                data = response.json()
+                if 'prices' in data:
+                    brand_prices = self._split_prices(brands, source, data['prices'])
+                    self.response_cache.store(url, params, response.headers, data['prices'])
+            else:
+                print(f"Failed to fetch data from {source['base_url']}: {response.status_code}")
+                breaker.record_failure()
+                return None
+            breaker.record_success()
+                
+        except Exception as e:
+            print(f"Error collecting data from {source['base_url']}: {str(e)}")
+            breaker.record_failure()
+            brand_prices = None
+            # Try fallback if available
+            if 'fallback_endpoint' in source:
                 try:
-                    # Check if scraping is allowed by robots.txt
-                    robots_parser = RobotsParser(source['base_url'])
-                    if not robots_parser.can_fetch(source['endpoint']):
-                        print(f"Scraping not allowed for {source['base_url']}")
-                        continue
-                    
-                    # Random delay to avoid detection
-                    self.proxy_session.random_delay(min_seconds=1, max_seconds=3)
-                    
-                    # Make the request with a clean user agent
+                    params = self._request_params(brands, source)
+                    params.pop('format')
                     response = self.proxy_session.get(
-                        f"{source['base_url']}{source['endpoint']}",
-                        params={'brand': brand, 'format': 'json'},
-                        headers={'User-Agent': self.proxy_session.get_random_user_agent()}
+                        f"{source['base_url']}{source['fallback_endpoint']}",
+                        params=params
                     )
-                    
                     if response.status_code == 200:
                         data = response.json()
-                        if 'prices' in data:
-                            brand_prices.extend(data['prices'])
-                    else:
-                        print(f"Failed to fetch data from {source['base_url']}: {response.status_code}")
-                        
-                except Exception as e:
-                    print(f"Error collecting data from {source['base_url']}: {str(e)}")
-                    # Try fallback if available
-                    if 'fallback_endpoint' in source:
-                        try:
-                            response = self.proxy_session.get(
-                                f"{source['base_url']}{source['fallback_endpoint']}",
-                                params={'brand': brand}
-                            )
-                            if response.status_code == 200:
-                                data = response.json()
-                                brand_prices.extend(data.get('prices', []))
-                        except Exception as fallback_error:
-                            print(f"Fallback also failed: {str(fallback_error)}")
-            
-            results[brand] = brand_prices
-            
-        return results
+                        brand_prices = self._split_prices(brands, source, data.get('prices', []))
+                except Exception as fallback_error:
+                    print(f"Fallback also failed: {str(fallback_error)}")
+        
+        return brand_prices
+    
+    def _fetch_host(self, host_tasks, deadline, task_prices):
+        # Requests to one host stay sequential, paced by its rate limit
+        for index, brands, source in host_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            task_prices[index] = self._fetch_source(brands, source)
+    
+    def collect_competitor_prices(self, gift_card_brands):
+        if not self.proxy_session:
+            self.initialize_proxy()
+        
+        deadline = None
+        if self.config.get('collection_deadline_seconds'):
+            deadline = time.monotonic() + self.config['collection_deadline_seconds']
+        
+        # One lane per host: different hosts are fetched in parallel, each host sequentially
+        tasks = self._plan_requests(gift_card_brands)
+        lanes = {}
+        for index, (brands, source) in enumerate(tasks):
+            host = urlparse(source['base_url']).netloc
+            lanes.setdefault(host, []).append((index, brands, source))
+        
+        # Requests that were skipped, failed or never ran by the deadline stay None
+        task_prices = [None] * len(tasks)
+        if lanes:
+            executor = ThreadPoolExecutor(max_workers=min(len(lanes), self.config.get('max_concurrent_hosts', 8)))
+            futures = [executor.submit(self._fetch_host, lane, deadline, task_prices) for lane in lanes.values()]
+            _, pending = wait(futures, timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+            if pending:
+                print(f"Market data collection hit its deadline with {len(pending)} hosts still in flight")
+            # Don't block pricing on hosts still in flight; they stop at their next request
+            executor.shutdown(wait=not pending, cancel_futures=True)
+        
+        # Same {brand: [prices]} shape as a sequential walk
+        prices_by_brand = {brand: [] for brand in gift_card_brands}
+        stale_brands = set()
+        for (brands, _), prices in zip(tasks, list(task_prices)):
+            if prices is None:
+                stale_brands.update(brands)
+                continue
+            for brand, brand_prices in prices.items():
+                prices_by_brand[brand].extend(brand_prices)
+        
+        # Brands missing fresh data keep their last known prices
+        for brand in prices_by_brand:
+            if brand not in stale_brands:
+                self._last_prices[brand] = prices_by_brand[brand]
+            elif brand in self._last_prices:
+                prices_by_brand[brand] = list(self._last_prices[brand])
+        if stale_brands:
+            print(f"Market data is stale for {len(stale_brands)} brands")
+        
+        self.response_cache.save()
+        return MarketData(prices_by_brand, [brand for brand in gift_card_brands if brand in stale_brands])
         
     def close(self):
         if self.proxy_session:
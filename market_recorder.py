@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+def _request_key(url, params):
+    return json.dumps([url, sorted((params or {}).items())])
+
+class RecordingSession:
+    """Wraps the proxy session and appends every response to a JSONL archive"""
+
+    def __init__(self, session, archive_path):
+        self.session = session
+        self.archive_path = Path(archive_path)
+        self.archive_path.parent.mkdir(parents=True, exist_ok=True)
+        self._archive = open(self.archive_path, 'a')
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None):
+        start = time.perf_counter()
+        response = self.session.get(url, params=params, headers=headers)
+        record = {
+            'url': url,
+            'params': params or {},
+            'status': response.status_code,
+            'headers': dict(response.headers),
+            'body': response.text,
+            'latency': time.perf_counter() - start,
+        }
+        with self._lock:
+            self._archive.write(json.dumps(record) + '\n')
+            self._archive.flush()
+        return response
+
+    def __getattr__(self, name):
+        # get_random_user_agent etc. go to the real session
+        return getattr(self.session, name)
+
+    def close(self):
+        self._archive.close()
+        self.session.close()
+
+class ReplayResponse:
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = body
+
+    def json(self):
+        return json.loads(self.text)
+
+class ReplaySession:
+    """Serves archived responses in place of the proxy session.
+
+    Requests are matched on URL and params; repeated requests step through the
+    recordings for that key in order and wrap around. Each response is delayed
+    by its recorded latency times `latency_scale` (0 replays without waiting).
+    """
+
+    def __init__(self, archive_path, latency_scale=1.0):
+        self.latency_scale = latency_scale
+        self.misses = 0
+        self._records = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        with open(archive_path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._records.setdefault(_request_key(record['url'], record['params']), []).append(record)
+
+    def get(self, url, params=None, headers=None):
+        key = _request_key(url, params)
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                self.misses += 1
+                return ReplayResponse(404, {}, '{}')
+            position = self._positions.get(key, 0)
+            self._positions[key] = (position + 1) % len(records)
+        record = records[position]
+        if self.latency_scale:
+            time.sleep(record['latency'] * self.latency_scale)
+        return ReplayResponse(record['status'], record['headers'], record['body'])
+
+    def get_random_user_agent(self):
+        return 'replay'
+
+    def close(self):
+        pass
+
+class ReplayRobotsParser:
+    """Allows everything: archived requests were already cleared by robots.txt when recorded"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def can_fetch(self, path):
+        return True
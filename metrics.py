@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Seconds; wide enough for per-type inference through full cycles
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+class _Metric:
+    metric_type = None
+
+    def __init__(self, name, help_text, const_labels=(), lock=None):
+        self.name = name
+        self.help_text = help_text
+        self.const_labels = tuple(const_labels)
+        self._lock = lock or threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return self.const_labels + tuple(sorted(labels.items()))
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name, help_text, const_labels=(), lock=None, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, const_labels, lock)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_series(self, key, series):
+        lines = []
+        for bound, count in zip(self.buckets, series['buckets']):
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', _format_value(bound)),))} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+class MetricsRegistry:
+    """Holds the optimizer's metrics and exposes them in the Prometheus text format"""
+
+    def __init__(self, const_labels=None):
+        self.const_labels = tuple(sorted((const_labels or {}).items()))
+        self._metrics = {}
+        self._server = None
+
+    def _register(self, cls, name, help_text, **kwargs):
+        if name not in self._metrics:
+            self._metrics[name] = cls(name, help_text, self.const_labels, **kwargs)
+        return self._metrics[name]
+
+    def counter(self, name, help_text):
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """Atomically write the metrics for a node_exporter textfile collector"""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /metrics over HTTP from a daemon thread"""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+class OptimizerMetrics:
+    """The price optimizer's cycle metrics, exported over HTTP and/or as a textfile"""
+
+    def __init__(self, config, shard_index=None):
+        self.registry = MetricsRegistry({'shard': shard_index} if shard_index is not None else None)
+        self.textfile = config.get('metrics_textfile')
+        if self.textfile and shard_index is not None:
+            self.textfile = f"{self.textfile}.shard-{shard_index}"
+
+        self.stage_seconds = self.registry.histogram(
+            'pricing_stage_duration_seconds', 'Duration of optimization cycle stages')
+        self.inference_seconds = self.registry.histogram(
+            'pricing_inference_duration_seconds', 'Duration of batch inference per gift card type')
+        self.cycle_seconds = self.registry.histogram(
+            'pricing_cycle_duration_seconds', 'Duration of a full repricing cycle')
+        self.last_cycle_seconds = self.registry.gauge(
+            'pricing_last_cycle_duration_seconds', 'Duration of the most recent repricing cycle')
+        self.last_cycle_timestamp = self.registry.gauge(
+            'pricing_last_cycle_timestamp_seconds', 'Unix time the most recent repricing cycle finished')
+        self.update_interval = self.registry.gauge(
+            'pricing_update_interval_seconds', 'Configured repricing interval')
+        self.items_priced = self.registry.counter(
+            'pricing_items_priced_total', 'Inventory items priced')
+        self.items_skipped = self.registry.counter(
+            'pricing_items_skipped_total', 'Inventory items skipped, by reason')
+        self.cycle_errors = self.registry.counter(
+            'pricing_cycle_errors_total', 'Optimization cycles that failed and were retried')
+        self.dashboard_failures = self.registry.counter(
+            'pricing_dashboard_failures_total', 'Dashboard regenerations that failed')
+
+        self.update_interval.set(config.get('update_interval_minutes', 0) * 60)
+
+        port = config.get('metrics_port')
+        if port:
+            # The coordinator keeps the configured port; shards take the ones after it
+            self.registry.serve(port if shard_index is None else port + 1 + shard_index,
+                                config.get('metrics_host', '127.0.0.1'))
+
+    def cycle_finished(self, seconds):
+        self.cycle_seconds.observe(seconds)
+        self.last_cycle_seconds.set(seconds)
+        self.last_cycle_timestamp.set(time.time())
+
+    def flush(self):
+        if self.textfile:
+            self.registry.write_textfile(self.textfile)
+
+    def close(self):
+        self.flush()
+        self.registry.close()
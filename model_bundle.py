@@ -0,0 +1,65 @@
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from pricing_model.seasonality_table import SeasonalityTable
+
+BUNDLE_FILE_NAME = "model_bundle.joblib"
+BUNDLE_VERSION = 2
+
+def write_model_bundle(models, output_dir):
+    """Write every type's model, seasonality table and feature list to a single file.
+
+    The bundle is dumped uncompressed so numpy arrays inside it (tree nodes,
+    coefficients, seasonality tables) can be memory-mapped on load.
+    """
+    types = {}
+    for gc_type, metadata in models.items():
+        table_path = metadata.get('seasonality_table_path')
+        types[gc_type] = {
+            'model': joblib.load(metadata['model_path']),
+            'seasonality_table': np.load(table_path) if table_path else None,
+            'seasonality_table_start': metadata.get('seasonality_table_start'),
+            'features': metadata['features'],
+            'model_path': metadata['model_path'],
+        }
+
+    bundle_path = Path(output_dir) / BUNDLE_FILE_NAME
+    tmp_path = bundle_path.with_suffix('.tmp')
+    joblib.dump({'version': BUNDLE_VERSION, 'types': types}, tmp_path)
+    os.replace(tmp_path, bundle_path)
+    return bundle_path
+
+class ModelBundle:
+    """All per-type models loaded from one file, with numpy arrays memory-mapped"""
+
+    def __init__(self, types):
+        self._types = types
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        bundle = joblib.load(path, mmap_mode=mmap_mode)
+        if bundle.get('version') != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported model bundle version {bundle.get('version')} in {path}")
+        return cls(bundle['types'])
+
+    @property
+    def types(self):
+        return list(self._types)
+
+    def model(self, gc_type):
+        return self._types[gc_type]['model']
+
+    def model_path(self, gc_type):
+        return self._types[gc_type]['model_path']
+
+    def features(self, gc_type):
+        return self._types[gc_type]['features']
+
+    def seasonality_table(self, gc_type):
+        entry = self._types[gc_type]
+        if entry['seasonality_table'] is None:
+            return None
+        return SeasonalityTable(entry['seasonality_table'], entry['seasonality_table_start'])
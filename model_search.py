@@ -0,0 +1,137 @@
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import (ExtraTreesRegressor, GradientBoostingRegressor,
+                              HistGradientBoostingRegressor, RandomForestRegressor)
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CANDIDATES = {
+    'ridge': lambda: Ridge(),
+    'random_forest': lambda: RandomForestRegressor(n_estimators=100, random_state=42),
+    'extra_trees': lambda: ExtraTreesRegressor(n_estimators=100, random_state=42),
+    'gradient_boosting': lambda: GradientBoostingRegressor(random_state=42),
+    'hist_gradient_boosting': lambda: HistGradientBoostingRegressor(random_state=42),
+}
+
+def _fit_and_score(name, factory, X_train, y_train, X_val, y_val):
+    start = time.perf_counter()
+    model = factory()
+    model.fit(X_train, y_train)
+    score = mean_absolute_error(y_val, model.predict(X_val))
+    return name, model, float(score), time.perf_counter() - start
+
+def _round_estimate(fit_seconds, survivors, sample_size, n_jobs):
+    """Expected wall time of a round, scaling each survivor's last fit linearly in rows"""
+    per_fit = [seconds * sample_size / rows for rows, seconds in (fit_seconds[name] for name in survivors)]
+    return max(per_fit) * math.ceil(len(survivors) / n_jobs)
+
+def select_model_within_budget(X_train, y_train, X_val, y_val, time_budget=60.0, candidates=None,
+                               n_jobs=None, eta=3, min_samples=200, random_state=42, refit_fraction=0.1):
+    """Pick the best regressor by validation MAE using successive halving under a wall-clock budget.
+
+    Every candidate is first fit on a small subsample. After each round only
+    the best 1/eta survive, and the sample grows by eta until one candidate is
+    left or the data is exhausted. Fits in a round run concurrently in a thread
+    pool of n_jobs. Running fits can't be interrupted, so each round after the
+    first is sized from the previous fit times to finish inside the remaining
+    budget; when not even a larger sample fits, the best model so far is
+    returned. Only the first round, on the smallest sample, is unbounded.
+
+    The winner is refit on all training rows if that is expected to fit in the
+    remaining budget, or to take at most refit_fraction of the whole budget
+    even if that overruns it. Otherwise it keeps its subsample fit, which is
+    logged as a warning and shows in info['train_rows'].
+
+    Returns (model, info), where info records the chosen name, its score and
+    the time spent.
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    candidates = dict(candidates or DEFAULT_CANDIDATES)
+    n_jobs = max(1, min(len(candidates), n_jobs or os.cpu_count() or 1))
+
+    n_rows = len(X_train)
+    rounds = max(1, math.ceil(math.log(len(candidates), eta))) if len(candidates) > 1 else 0
+    sample_size = min(n_rows, max(min_samples, n_rows // (eta ** rounds)))
+    order = np.random.RandomState(random_state).permutation(n_rows)
+
+    survivors = list(candidates)
+    scores = {}
+    fit_seconds = {}  # name -> (rows, seconds) of its latest fit
+    best = None  # (score, name, model, sample_size, seconds)
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        while survivors:
+            if best is not None:
+                # Shrink the round's sample until it is expected to fit in what is left
+                remaining = deadline - time.perf_counter()
+                estimate = _round_estimate(fit_seconds, survivors, sample_size, n_jobs)
+                if estimate > remaining:
+                    sample_size = int(sample_size * remaining / estimate)
+                if sample_size <= best[3]:
+                    break
+
+            # Nested subsamples, so each round sees a superset of the previous rows
+            idx = order[:sample_size]
+            X_sample, y_sample = X_train.iloc[idx], y_train.iloc[idx]
+
+            futures = [
+                executor.submit(_fit_and_score, name, candidates[name], X_sample, y_sample, X_val, y_val)
+                for name in survivors
+            ]
+
+            round_results = []
+            for future in futures:
+                try:
+                    round_results.append(future.result())
+                except Exception as e:
+                    logger.warning(f"Candidate failed during model search: {str(e)}")
+            if not round_results:
+                break
+
+            round_results.sort(key=lambda result: result[2])
+            for name, model, score, seconds in round_results:
+                scores[name] = score
+                fit_seconds[name] = (sample_size, seconds)
+            name, model, score, seconds = round_results[0]
+            best = (score, name, model, sample_size, seconds)
+            logger.info(f"Model search round on {sample_size} rows: best {name} (MAE {score:.4f})")
+
+            if len(round_results) == 1 or sample_size >= n_rows:
+                break
+
+            keep = max(1, math.ceil(len(round_results) / eta))
+            survivors = [result[0] for result in round_results[:keep]]
+            sample_size = min(n_rows, sample_size * eta)
+
+    if best is None:
+        raise RuntimeError("No candidate model could be fit during model search")
+
+    score, name, model, fitted_rows, winner_seconds = best
+
+    # Refit the winner on all rows when the budget allows it or the fit is cheap (fit time scales ~linearly)
+    if fitted_rows < n_rows:
+        estimate = winner_seconds * n_rows / fitted_rows
+        if time.perf_counter() + estimate <= deadline or estimate <= refit_fraction * time_budget:
+            _, model, score, _ = _fit_and_score(name, candidates[name], X_train, y_train, X_val, y_val)
+            fitted_rows = n_rows
+        else:
+            logger.warning(f"Model search budget spent: {name} is trained on {fitted_rows} of {n_rows} rows "
+                           f"(a full refit would take ~{estimate:.1f}s)")
+
+    info = {
+        'model': name,
+        'score': score,
+        'metric': 'mae',
+        'train_rows': int(fitted_rows),
+        'candidate_scores': scores,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    return model, info
@@ -0,0 +1,70 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ModelWatcher:
+    """Reloads models on a background thread when the files written by training change.
+
+    The watched files are stat-ed every poll_seconds. A reload starts only once
+    their signature has stayed the same for two consecutive polls, so it never
+    reads a training run that is still writing. The result waits in a pending
+    slot until the caller takes it with take() between cycles. The caller
+    therefore swaps in a fully loaded set of models in one assignment and never
+    waits on deserialization.
+    """
+
+    def __init__(self, paths, loader, poll_seconds=30):
+        self.paths = list(paths)
+        self.loader = loader
+        self.poll_seconds = poll_seconds
+        self._loaded_signature = self._signature()
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+
+    def _signature(self):
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _run(self):
+        last_seen = self._loaded_signature
+        while not self._stop.wait(self.poll_seconds):
+            signature = self._signature()
+            settled = signature == last_seen
+            last_seen = signature
+            if not settled or signature == self._loaded_signature:
+                continue
+
+            logger.info("Model files changed, loading new models in the background")
+            try:
+                loaded = self.loader()
+            except Exception as e:
+                logger.error(f"Failed to load new models, keeping the current ones: {str(e)}")
+                continue
+
+            with self._lock:
+                self._pending = loaded
+            self._loaded_signature = signature
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def take(self):
+        """Return newly loaded models once, or None if nothing new is ready"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        return pending
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=self.poll_seconds)
@@ -0,0 +1,31 @@
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+def partition_file_name(gc_type):
+    return f"{gc_type.lower().replace(' ', '_')}.csv"
+
+def spill_partitions(data_path, spill_dir, chunksize=500000, key='gift_card_type'):
+    """Stream a CSV in chunks and append each row to a spill file for its gift card type.
+
+    Only one chunk is held in memory at a time. Returns a dict mapping each
+    type to its spill file path and row count.
+    """
+    spill_dir = Path(spill_dir)
+    spill_dir.mkdir(parents=True, exist_ok=True)
+    partitions = {}
+
+    for i, chunk in enumerate(pd.read_csv(data_path, chunksize=chunksize)):
+        for gc_type, rows in chunk.groupby(key, sort=False):
+            if gc_type not in partitions:
+                partitions[gc_type] = {'path': spill_dir / partition_file_name(gc_type), 'rows': 0}
+                rows.to_csv(partitions[gc_type]['path'], index=False)
+            else:
+                rows.to_csv(partitions[gc_type]['path'], mode='a', header=False, index=False)
+            partitions[gc_type]['rows'] += len(rows)
+        logger.info(f"Partitioned chunk {i + 1} of {data_path} ({len(partitions)} types so far)")
+
+    return partitions
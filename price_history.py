@@ -0,0 +1,132 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+class PriceHistoryStore:
+    """Append-only price history, stored as one Parquet file per batch under hourly partitions.
+
+    Layout: <root>/date=YYYY-MM-DD/hour=HH/part-<timestamp>.parquet. Writing a
+    batch never touches earlier files, and reads only open the partitions that
+    overlap the requested time range. Once an hour has closed, its parts are
+    compacted into a single compacted-<timestamp>.parquet that covers every
+    part up to that timestamp, so any leftover parts are ignored if compaction
+    is interrupted.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._last_hour = None
+
+    def _partition_dir(self, ts):
+        return self.root / f"date={ts:%Y-%m-%d}" / f"hour={ts:%H}"
+
+    def append(self, changes_df, timestamp=None):
+        """Write one cycle of price changes and return the new part file"""
+        ts = pd.Timestamp(timestamp) if timestamp is not None else pd.Timestamp.now()
+        partition_dir = self._partition_dir(ts)
+        partition_dir.mkdir(parents=True, exist_ok=True)
+
+        part_path = partition_dir / f"part-{ts:%Y%m%dT%H%M%S%f}.parquet"
+        tmp_path = part_path.with_suffix('.tmp')
+        changes_df.assign(timestamp=ts).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, part_path)
+
+        # Compact the hours that closed since the last write
+        hour = ts.floor('h')
+        if self._last_hour is None or hour > self._last_hour:
+            self.compact(before=hour)
+            self._last_hour = hour
+        return part_path
+
+    @staticmethod
+    def _stamp(path):
+        return path.stem.split('-', 1)[1]
+
+    def _hour_files(self, hour_dir):
+        """The newest compacted file (or None) and the parts it doesn't cover"""
+        compacted = max(hour_dir.glob('compacted-*.parquet'), key=self._stamp, default=None)
+        parts = sorted(hour_dir.glob('part-*.parquet'))
+        if compacted is not None:
+            parts = [path for path in parts if self._stamp(path) > self._stamp(compacted)]
+        return compacted, parts
+
+    def compact(self, before=None):
+        """Merge each hour partition that ended by `before` (default: now) into one file"""
+        before = pd.Timestamp(before) if before is not None else pd.Timestamp.now().floor('h')
+        for hour_dir in sorted(self.root.glob('date=*/hour=*')):
+            if self._hour_start(hour_dir) >= before:
+                continue
+            compacted, parts = self._hour_files(hour_dir)
+            if not parts or (compacted is None and len(parts) == 1):
+                continue
+
+            sources = ([compacted] if compacted is not None else []) + parts
+            merged = pd.concat([pd.read_parquet(path) for path in sources], ignore_index=True)
+            merged_path = hour_dir / f"compacted-{self._stamp(parts[-1])}.parquet"
+            tmp_path = merged_path.with_suffix('.tmp')
+            merged.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, merged_path)
+            for path in sources:
+                path.unlink(missing_ok=True)
+
+    def import_csv(self, csv_path):
+        """One-time import of a legacy price_update_history.csv, one part file per recorded cycle"""
+        history_df = pd.read_csv(csv_path)
+        if 'timestamp' not in history_df.columns:
+            history_df['timestamp'] = pd.Timestamp.now()
+        history_df['timestamp'] = pd.to_datetime(history_df['timestamp'])
+        for ts, cycle_df in history_df.groupby('timestamp', sort=True):
+            self.append(cycle_df.drop(columns='timestamp'), ts)
+        return len(history_df)
+
+    @staticmethod
+    def _hour_start(hour_dir):
+        return pd.Timestamp(f"{hour_dir.parent.name[5:]} {hour_dir.name[5:]}:00")
+
+    def partitions(self, start=None, end=None):
+        """Data files whose hourly partition overlaps [start, end)"""
+        start = pd.Timestamp(start).floor('h') if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        paths = []
+        for hour_dir in sorted(self.root.glob('date=*/hour=*')):
+            hour_start = self._hour_start(hour_dir)
+            if start is not None and hour_start < start:
+                continue
+            if end is not None and hour_start >= end:
+                continue
+            compacted, parts = self._hour_files(hour_dir)
+            if compacted is not None:
+                paths.append(compacted)
+            paths.extend(parts)
+        return paths
+
+    def read(self, start=None, end=None, columns=None):
+        """Load price changes recorded in [start, end), optionally only some columns"""
+        if columns is not None and 'timestamp' not in columns:
+            read_columns = list(columns) + ['timestamp']
+        else:
+            read_columns = columns
+
+        # A compaction can replace the files between listing and reading them; list again once
+        for attempt in range(2):
+            paths = self.partitions(start, end)
+            if not paths:
+                return pd.DataFrame(columns=columns)
+            try:
+                frames = [pd.read_parquet(path, columns=read_columns) for path in paths]
+                break
+            except FileNotFoundError:
+                if attempt:
+                    raise
+        history_df = pd.concat(frames, ignore_index=True)
+
+        if start is not None:
+            history_df = history_df[history_df['timestamp'] >= pd.Timestamp(start)]
+        if end is not None:
+            history_df = history_df[history_df['timestamp'] < pd.Timestamp(end)]
+        if columns is not None:
+            history_df = history_df[list(columns)]
+        return history_df.reset_index(drop=True)
@@ -0,0 +1,103 @@
+import logging
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from pricing_model.change_feed import PriceChangeFeed
+from pricing_model.price_history import PriceHistoryStore
+
+logger = logging.getLogger("GiftCardPricing")
+
+# Columns of the price updates written each cycle
+PRICE_UPDATE_COLUMNS = ['gift_card_id', 'old_price', 'new_price', 'change', 'change_percentage']
+
+class PricePublisher:
+    """Publishes batches of price updates to price_updates.csv or the change feed, and the history.
+
+    Batches cover only the brands that were due, so the latest set starts from
+    the previous run's price_updates.csv and each batch is merged into it. In
+    full mode the file is rewritten at most every csv_write_interval_seconds;
+    flush() writes pending changes once the interval has passed.
+    """
+
+    def __init__(self, data_dir, config):
+        self.data_dir = Path(data_dir)
+        self.config = config
+        self.updates_file = self.data_dir / "price_updates.csv"
+        self.csv_write_interval = config.get('csv_write_interval_seconds', 60)
+        self._dirty = False
+        self._last_write = 0.0
+
+        # Start from the previous run's prices so the first partial batch doesn't replace them all
+        self.latest_updates = pd.DataFrame(columns=PRICE_UPDATE_COLUMNS)
+        if self.updates_file.exists():
+            try:
+                self.latest_updates = pd.read_csv(self.updates_file)
+                logger.info(f"Loaded {len(self.latest_updates)} previously published updates from {self.updates_file}")
+            except Exception as e:
+                logger.warning(f"Could not read {self.updates_file}, starting empty: {str(e)}")
+
+        # In delta mode only moved prices are published, as a sequence-numbered change feed
+        self.change_feed = None
+        if config.get('publish_mode', 'full') == 'delta':
+            self.change_feed = PriceChangeFeed(
+                self.data_dir / "price_feed",
+                snapshot_interval_seconds=config.get('feed_snapshot_interval_seconds', 300)
+            )
+
+        # Append-only price history, partitioned by hour
+        self.history_store = PriceHistoryStore(self.data_dir / "price_history")
+        legacy_history_file = self.data_dir / "price_update_history.csv"
+        if legacy_history_file.exists() and not self.history_store.partitions():
+            imported = self.history_store.import_csv(legacy_history_file)
+            legacy_history_file.rename(legacy_history_file.with_suffix('.csv.imported'))
+            logger.info(f"Imported {imported} rows from {legacy_history_file} into the price history store")
+
+    def publish(self, changes_df, removed_ids=()):
+        """Merge a batch of price updates into the latest set and publish it"""
+        # Replace updates for repriced items and drop items no longer in inventory
+        stale = self.latest_updates['gift_card_id'].isin(changes_df['gift_card_id']) | \
+            self.latest_updates['gift_card_id'].isin(removed_ids)
+        self.latest_updates = pd.concat([self.latest_updates[~stale], changes_df], ignore_index=True)
+
+        # Publish updates for the API to pick up
+        if self.change_feed is not None:
+            published_df = self.change_feed.publish(
+                changes_df, threshold=self.config.get('price_change_threshold', 0.01)
+            )
+            removed = self.change_feed.remove(removed_ids)
+            logger.info(f"Published {len(published_df)} changed prices and {len(removed)} removals "
+                        f"(feed at seq {self.change_feed.last_seq})")
+        else:
+            self._dirty = True
+            self.flush()
+
+        # Append this batch to the price history for dashboard
+        if not changes_df.empty:
+            self.history_store.append(changes_df)
+
+    def flush(self, force=False):
+        """Rewrite price_updates.csv if there are unwritten updates and the write interval has passed"""
+        if not self._dirty:
+            return
+        if not force and time.monotonic() - self._last_write < self.csv_write_interval:
+            return
+        tmp_path = self.updates_file.with_suffix('.tmp')
+        self.latest_updates.to_csv(tmp_path, index=False)
+        tmp_path.replace(self.updates_file)
+        self._dirty = False
+        self._last_write = time.monotonic()
+
+class ShardPublisher:
+    """Stands in for PricePublisher in a shard worker, handing batches to the coordinator"""
+
+    def __init__(self, results_queue, shard_index):
+        self.results_queue = results_queue
+        self.shard_index = shard_index
+
+    def publish(self, changes_df, removed_ids=()):
+        self.results_queue.put((self.shard_index, changes_df, list(removed_ids)))
+
+    def flush(self, force=False):
+        pass
@@ -0,0 +1,59 @@
+import threading
+import time
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available; returns the seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now so concurrent callers queue up behind each other
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class HostRateLimiter:
+    """One token bucket per host, so each host's politeness budget is independent.
+
+    `limits` is the `rate_limits` config: a `default` {rate, burst} and optional
+    per-host overrides under `hosts`. The limits are a budget for the whole
+    optimizer, so when `shares` processes collect at once (one per shard) each
+    gets 1/shares of it.
+    """
+
+    def __init__(self, limits=None, shares=1):
+        limits = limits or {}
+        self.shares = shares
+        self.default = {'rate': 0.5, 'burst': 1, **limits.get('default', {})}
+        self.host_limits = limits.get('hosts', {})
+        self.waited_seconds = 0.0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                limit = {**self.default, **self.host_limits.get(host, {})}
+                bucket = self._buckets[host] = TokenBucket(
+                    limit['rate'] / self.shares, max(1, limit['burst'] / self.shares)
+                )
+            return bucket
+
+    def acquire(self, host):
+        waited = self._bucket(host).acquire()
+        with self._lock:
+            self.waited_seconds += waited
+        return waited
@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+def _max_age(headers):
+    """Seconds the response may be reused without revalidation; None if it must not be stored"""
+    directives = [d.strip().lower() for d in headers.get('Cache-Control', '').split(',') if d.strip()]
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0
+    for directive in directives:
+        if directive.startswith('max-age='):
+            try:
+                return max(int(directive.split('=', 1)[1]), 0)
+            except ValueError:
+                return 0
+    return 0
+
+class ResponseCache:
+    """LRU cache of parsed competitor price responses, keyed by URL and params.
+
+    Entries keep the ETag / Last-Modified validators so an expired entry can be
+    revalidated with a conditional request, and a 304 reuses the cached prices
+    instead of downloading and decoding the body again. With a path, the cache
+    is loaded on start and written back by save().
+    """
+
+    def __init__(self, max_entries=1024, path=None):
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    @staticmethod
+    def key(url, params):
+        return json.dumps([url, sorted((params or {}).items())])
+
+    def get(self, url, params):
+        with self._lock:
+            entry = self._entries.get(self.key(url, params))
+            if entry is not None:
+                self._entries.move_to_end(self.key(url, params))
+            return entry
+
+    def fresh_prices(self, url, params):
+        """Cached prices if the entry is still within its max-age, else None"""
+        entry = self.get(url, params)
+        if entry is not None and entry['expires_at'] > time.time():
+            self.hits += 1
+            return entry['prices']
+        return None
+
+    def conditional_headers(self, url, params):
+        entry = self.get(url, params)
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def not_modified(self, url, params, headers):
+        """Handle a 304: extend the entry's freshness and return its cached prices"""
+        entry = self.get(url, params)
+        if entry is None:
+            return None
+        max_age = _max_age(headers)
+        entry['expires_at'] = time.time() + (max_age or 0)
+        entry['etag'] = headers.get('ETag', entry.get('etag'))
+        entry['last_modified'] = headers.get('Last-Modified', entry.get('last_modified'))
+        self.revalidated += 1
+        return entry['prices']
+
+    def store(self, url, params, headers, prices):
+        self.misses += 1
+        max_age = _max_age(headers)
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        # Nothing to gain from an entry that can neither be reused nor revalidated
+        if max_age is None or (max_age == 0 and not etag and not last_modified):
+            return
+        key = self.key(url, params)
+        with self._lock:
+            self._entries[key] = {
+                'expires_at': time.time() + max_age,
+                'etag': etag,
+                'last_modified': last_modified,
+                'prices': prices,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, entry in entries[-self.max_entries:]:
+            self._entries[key] = entry
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            entries = list(self._entries.items())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # A private tmp file per save, so concurrent savers never write into each other's
+        fd, tmp_path = tempfile.mkstemp(prefix=self.path.name + '.', suffix='.tmp', dir=self.path.parent)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses, 'size': size}
@@ -0,0 +1,39 @@
+import threading
+import time
+
+class RobotsCache:
+    """TTL cache of parsed robots.txt rules, keyed by base URL.
+
+    One parser per site is shared by every brand and every cycle until it
+    expires, instead of re-fetching robots.txt for each request.
+    """
+
+    def __init__(self, parser_factory, ttl_seconds=3600):
+        self.parser_factory = parser_factory
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, base_url):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(base_url)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Fetch outside the lock so a slow site doesn't hold up lookups for others
+        parser = self.parser_factory(base_url)
+        with self._lock:
+            self._entries[base_url] = (now + self.ttl_seconds, parser)
+        return parser
+
+    def can_fetch(self, base_url, path):
+        return self.get(base_url).can_fetch(path)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
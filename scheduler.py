@@ -0,0 +1,67 @@
+import heapq
+import time
+
+class BrandScheduler:
+    """Per-brand repricing schedule spread across the update interval.
+
+    Each brand has its own interval (the default interval unless overridden),
+    and brands start at evenly staggered offsets so the work is spread across
+    the interval instead of arriving as one spike. trigger() makes a brand due
+    immediately, e.g. when its competitor prices move.
+    """
+
+    def __init__(self, brands, interval_seconds, brand_intervals=None, stagger=True, now=None):
+        self.interval_seconds = interval_seconds
+        self.brand_intervals = dict(brand_intervals or {})
+        self.stagger = stagger
+        self._heap = []
+        self._due = {}
+        self.sync(brands, now)
+
+    def interval_for(self, brand):
+        return self.brand_intervals.get(brand, self.interval_seconds)
+
+    def _schedule(self, brand, due):
+        # Superseded heap entries are skipped lazily in pop_due
+        self._due[brand] = due
+        heapq.heappush(self._heap, (due, brand))
+
+    def sync(self, brands, now=None):
+        """Add brands that are new and forget brands that are gone"""
+        now = time.monotonic() if now is None else now
+        brands = list(dict.fromkeys(brands))
+        for brand in set(self._due) - set(brands):
+            del self._due[brand]
+
+        new_brands = [brand for brand in brands if brand not in self._due]
+        for i, brand in enumerate(new_brands):
+            offset = self.interval_for(brand) * i / len(new_brands) if self.stagger else 0
+            self._schedule(brand, now + offset)
+
+    def trigger(self, brand, now=None):
+        """Make a brand due now, ahead of its regular slot"""
+        if brand in self._due:
+            self._schedule(brand, time.monotonic() if now is None else now)
+
+    def next_due(self):
+        """Time (on the monotonic clock) the next brand becomes due, or None"""
+        while self._heap:
+            due, brand = self._heap[0]
+            if self._due.get(brand) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now=None):
+        """Return brands that are due and schedule each one's next slot"""
+        now = time.monotonic() if now is None else now
+        due_brands = []
+        while self._heap and self._heap[0][0] <= now:
+            due, brand = heapq.heappop(self._heap)
+            if self._due.get(brand) != due:
+                continue
+            due_brands.append(brand)
+            # Keep the brand's phase unless it has fallen a whole interval behind
+            next_due = due + self.interval_for(brand)
+            self._schedule(brand, next_due if next_due > now else now + self.interval_for(brand))
+        return due_brands
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from pricing_model.seasonality import predict_seasonal_effect
+
+# 52 weeks: shifting by this keeps the day of week and stays within a day or two of the day of year
+WEEKS_PER_YEAR_DAYS = 364
+
+def build_seasonality_table(seasonality_model, start_date, horizon_days=WEEKS_PER_YEAR_DAYS):
+    """Evaluate a seasonality model once per day over a fixed horizon"""
+    dates = pd.date_range(pd.Timestamp(start_date).normalize(), periods=horizon_days, freq='D')
+    return np.array([predict_seasonal_effect(seasonality_model, date) for date in dates], dtype=np.float64)
+
+def save_seasonality_table(table, path):
+    np.save(path, np.asarray(table, dtype=np.float64))
+
+class SeasonalityTable:
+    """Dense per-day seasonal effects, looked up by array index instead of a model call"""
+
+    def __init__(self, table, start_date):
+        self.table = table
+        self.start_date = pd.Timestamp(start_date).normalize()
+
+    @classmethod
+    def load(cls, path, start_date):
+        return cls(np.load(path, mmap_mode='r'), start_date)
+
+    def _offsets(self, dates):
+        offsets = np.array((pd.DatetimeIndex(dates).normalize() - self.start_date).days, dtype=np.int64)
+        horizon = len(self.table)
+        if horizon >= WEEKS_PER_YEAR_DAYS:
+            # Past the horizon, reuse the same weekday a whole number of 52-week years earlier
+            overflow = offsets >= horizon
+            years_back = (offsets[overflow] - horizon) // WEEKS_PER_YEAR_DAYS + 1
+            offsets[overflow] -= years_back * WEEKS_PER_YEAR_DAYS
+        return np.clip(offsets, 0, horizon - 1)
+
+    def effects(self, dates):
+        return self.table[self._offsets(dates)]
+
+    def effect(self, date):
+        return float(self.effects([date])[0])
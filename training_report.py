@@ -0,0 +1,93 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+def _read_hwm_mb():
+    """Linux high-water mark of resident memory (VmHWM) since it was last reset, in MB"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def _reset_hwm():
+    """Reset VmHWM to the current RSS; False where that isn't supported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+# Running peak of each open stage in this process, innermost last
+_open_stage_peaks = []
+
+class StageTimer:
+    """Records wall time, CPU time and peak RSS for named pipeline stages.
+
+    On Linux each stage's own peak is measured by resetting VmHWM when it
+    starts. A nested stage's reset would hide the outer stage's earlier peak,
+    so the outer running peak is folded in before the reset and the inner peak
+    after it. Elsewhere only the process-lifetime peak is available and is
+    recorded as process_peak_rss_mb.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        if _open_stage_peaks:
+            _open_stage_peaks[-1] = max(_open_stage_peaks[-1], _read_hwm_mb() or 0)
+        per_stage = _reset_hwm()
+        _open_stage_peaks.append(0)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            peak = max(_open_stage_peaks.pop(), _read_hwm_mb() or 0)
+            if _open_stage_peaks:
+                _open_stage_peaks[-1] = max(_open_stage_peaks[-1], peak)
+            self.stages[name] = {
+                'wall_seconds': round(time.perf_counter() - wall_start, 3),
+                'cpu_seconds': round(time.process_time() - cpu_start, 3),
+            }
+            if per_stage:
+                self.stages[name]['peak_rss_mb'] = peak
+            else:
+                self.stages[name]['process_peak_rss_mb'] = peak_rss_mb()
+
+def write_training_report(output_dir, started_at, stages, type_stages, skipped_types):
+    """Write per-stage and per-type resource usage next to model_metadata.json"""
+    report = {
+        'started_at': started_at,
+        'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'stages': stages,
+        'types': type_stages,
+        'skipped_types': list(skipped_types),
+    }
+    report_path = Path(output_dir) / "training_report.json"
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return report_path